@@ -0,0 +1,92 @@
+import json
+import time
+from typing import Any, Dict
+
+from aiohttp import web
+
+# The bot account returned by getMe
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'NotesBot', 'username': 'notes_bot'}
+
+
+class FakeTelegram:
+    """
+    A local stub of the Telegram Bot API answering the methods used by the bot.
+
+    Sent and edited messages are kept per chat, so the load generator can find the
+    buttons of the message the user sees and press them.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = {}
+        self.messages: Dict[int, Dict[str, Any]] = {}
+        self._message_id = 0
+
+    def last_message(self, chat_id: int) -> Dict[str, Any]:
+        """
+        Get the last message the bot sent or edited in a chat.
+
+        Args:
+            chat_id: The ID of the chat.
+
+        Returns:
+            The message in the Bot API format.
+        """
+        return self.messages[chat_id]
+
+    def _message(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a message from the fields of a send or edit request and remember it.
+
+        Args:
+            fields: The fields of the request.
+
+        Returns:
+            The message in the Bot API format.
+        """
+        chat_id = int(fields['chat_id'])
+        message = self.messages.get(chat_id, {})
+
+        if 'message_id' not in fields:
+            self._message_id += 1
+            message = {'message_id': self._message_id, 'chat': {'id': chat_id, 'type': 'private'}}
+
+        message['date'] = int(time.time())
+        if 'text' in fields:
+            message['text'] = fields['text']
+        message['reply_markup'] = json.loads(fields.get('reply_markup') or '{"inline_keyboard": []}')
+        self.messages[chat_id] = message
+        return message
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Answer a Bot API method call.
+
+        Args:
+            request: The incoming request.
+
+        Returns:
+            The Bot API response.
+        """
+        method = request.match_info['method'].lower()
+        fields = dict(await request.post())
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method == 'getme':
+            result = BOT_USER
+        elif method in ('sendmessage', 'editmessagetext', 'editmessagereplymarkup'):
+            result = self._message(fields)
+        else:
+            result = True
+
+        return web.json_response({'ok': True, 'result': result})
+
+    def create_app(self) -> web.Application:
+        """
+        Create the aiohttp application serving the stub.
+
+        Returns:
+            The aiohttp application.
+        """
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        return app
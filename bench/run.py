@@ -0,0 +1,258 @@
+"""
+Load test of the notes dialogs against a local Telegram Bot API stub.
+
+Every virtual user starts the bot, adds notes, pages through the list, opens and
+deletes a note and searches, pressing the buttons of the messages the bot sent.
+Updates are fed to the dispatcher in-process and the time to handle each of them
+is reported per action.
+
+Usage:
+    python -m bench.run --users 50 --notes 20
+"""
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import time
+from itertools import count
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+from bench.fake_telegram import FakeTelegram
+
+# Settings required by the configuration, values from the environment or .env take precedence
+for key, value in (('TOKEN', '123456:BENCHMARKBENCHMARKBENCHMARKBENCHMAR'), ('DB_HOST', 'localhost'),
+                   ('DB_PORT', '6379'), ('DB_NUMBER', '0'), ('ALLOWED_USERS', ''), ('PAGE_SIZE', '5'),
+                   ('HEIGHT', '2'), ('LOGS_LEVEL', 'WARNING')):
+    os.environ.setdefault(key, value)
+
+# Sequence numbers of the generated updates, messages and callback queries
+_ids = count(1)
+
+
+def use_fake_redis() -> None:
+    """
+    Replace the Redis client of the bot with an in-memory fakeredis instance.
+
+    Must be called before main is imported, since the FSM storage is created on import.
+    """
+    import fakeredis
+
+    import database
+    import database.database
+
+    fake = fakeredis.FakeAsyncRedis(decode_responses=True, encoding_errors='surrogateescape')
+    database.database.redis = database.database.fsm_redis = fake
+    database.redis = database.fsm_redis = fake
+
+
+class VirtualUser:
+    """
+    A simulated user talking to the bot.
+    """
+
+    def __init__(self, user_id: int, dp: Any, bot: Any, telegram: FakeTelegram,
+                 timings: Dict[str, List[float]], **kwargs: Any) -> None:
+        """
+        Args:
+            user_id: The Telegram ID of the user.
+            dp: The dispatcher handling the updates.
+            bot: The bot instance.
+            telegram: The Bot API stub the bot talks to.
+            timings: The handling times of updates by action, filled by the user.
+            kwargs: Additional data passed to the handlers.
+        """
+        self.user = {'id': user_id, 'is_bot': False, 'first_name': 'User', 'language_code': 'en'}
+        self.chat = {'id': user_id, 'type': 'private'}
+        self.dp = dp
+        self.bot = bot
+        self.telegram = telegram
+        self.timings = timings
+        self.kwargs = kwargs
+
+    async def _feed(self, action: str, update: Dict[str, Any]) -> None:
+        """
+        Handle an update and record the time it took.
+
+        Args:
+            action: The name of the action the update belongs to.
+            update: The update in the Bot API format.
+        """
+        start = time.perf_counter()
+        await self.dp.feed_raw_update(self.bot, update, **self.kwargs)
+        self.timings.setdefault(action, []).append(time.perf_counter() - start)
+
+    async def send(self, action: str, text: str) -> None:
+        """
+        Send a text message to the bot.
+
+        Args:
+            action: The name of the action.
+            text: The text of the message.
+        """
+        await self._feed(action, {
+            'update_id': next(_ids),
+            'message': {'message_id': next(_ids), 'date': int(time.time()), 'chat': self.chat,
+                        'from': self.user, 'text': text},
+        })
+
+    async def click(self, action: str, pattern: str) -> bool:
+        """
+        Press the first button of the last bot message whose text matches a pattern.
+
+        Args:
+            action: The name of the action.
+            pattern: The regular expression the button text must match.
+
+        Returns:
+            True if a button was pressed, False if there was none.
+        """
+        message = self.telegram.last_message(self.chat['id'])
+        buttons = [button for row in message['reply_markup']['inline_keyboard'] for button in row
+                   if re.fullmatch(pattern, button['text'])]
+        if not buttons:
+            return False
+
+        await self._feed(action, {
+            'update_id': next(_ids),
+            'callback_query': {'id': str(next(_ids)), 'from': self.user, 'chat_instance': str(self.chat['id']),
+                               'data': buttons[0]['callback_data'],
+                               'message': {'message_id': message['message_id'], 'date': message['date'],
+                                           'chat': self.chat, 'text': message.get('text', '')}},
+        })
+        return True
+
+    async def session(self, notes: int, pages: int) -> None:
+        """
+        Go through a typical session.
+
+        Args:
+            notes: The number of notes to add.
+            pages: The number of list pages to flip through.
+        """
+        await self.send('start', '/start')
+
+        for number in range(notes):
+            await self.click('add_open', 'Add a note')
+            await self.send('add_title', f'note {number}')
+            await self.send('add_body', f'body of note {number} ' * 20)
+
+        await self.click('list', 'List of notes')
+        for _ in range(pages):
+            if not await self.click('page', '>'):
+                break
+        await self.click('open', r'\d+')
+        await self.click('delete', 'Delete')
+        await self.click('back', 'Back')
+
+        await self.click('search_open', 'Search')
+        await self.send('search', 'body note')
+        await self.click('open', r'\d+')
+        await self.click('back', 'Back')
+        await self.click('back', 'Back')
+
+
+def report(timings: Dict[str, List[float]], elapsed: float) -> str:
+    """
+    Format the handling times as a table of latency percentiles per action.
+
+    Args:
+        timings: The handling times of updates by action.
+        elapsed: The duration of the run in seconds.
+
+    Returns:
+        The formatted report.
+    """
+    lines = [f"{'action':<12}{'count':>8}{'mean ms':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    total = 0
+
+    for action, values in timings.items():
+        total += len(values)
+        percentiles = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+        lines.append(f'{action:<12}{len(values):>8}{statistics.fmean(values) * 1000:>10.2f}'
+                     f'{percentiles[49] * 1000:>10.2f}{percentiles[89] * 1000:>10.2f}'
+                     f'{percentiles[98] * 1000:>10.2f}{max(values) * 1000:>10.2f}')
+
+    lines.append(f'\n{total} updates in {elapsed:.2f} s, {total / elapsed:.1f} updates/s')
+    return '\n'.join(lines)
+
+
+async def run_benchmark(args: argparse.Namespace) -> None:
+    """
+    Start the Bot API stub, set up the bot and run the virtual users.
+
+    Args:
+        args: The command line arguments.
+    """
+    if not args.real_redis:
+        use_fake_redis()
+
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    import main
+    from database import cache
+    from log_config import setup_logging
+    from utils.metrics import registry
+
+    setup_logging()
+
+    telegram = FakeTelegram()
+    runner = web.AppRunner(telegram.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, host='127.0.0.1', port=args.api_port).start()
+
+    main.bot.session = AiohttpSession(api=TelegramAPIServer.from_base(f'http://127.0.0.1:{args.api_port}'))
+    if not args.rate_limits:
+        # Virtual users act at machine speed, which the rate limits would throttle
+        main.config.throttling.user_rate = main.config.throttling.global_rate = main.config.throttling.chat_rate = 0
+    translator_hub = main._setup_dispatcher()
+    if args.no_cache:
+        cache.max_entries = 0
+
+    user_ids = range(args.first_user_id, args.first_user_id + args.users)
+    main.allowlist.users = frozenset(user_ids)
+    timings: Dict[str, List[float]] = {}
+    users = [VirtualUser(user_id, main.dp, main.bot, telegram, timings, _translator_hub=translator_hub)
+             for user_id in user_ids]
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(user.session(args.notes, args.pages) for user in users))
+        elapsed = time.perf_counter() - start
+    finally:
+        await main.bot.session.close()
+        await runner.cleanup()
+
+    print(report(timings, elapsed))
+    print(f'\nBot API calls: {telegram.calls}')
+    print(f'Read cache: {cache.stats()}')
+    if args.metrics:
+        print(registry.render())
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse the command line arguments.
+
+    Returns:
+        The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20, help='number of concurrent virtual users')
+    parser.add_argument('--notes', type=int, default=15, help='notes added by every user')
+    parser.add_argument('--pages', type=int, default=3, help='list pages flipped by every user')
+    parser.add_argument('--first-user-id', type=int, default=100000, help='Telegram ID of the first user')
+    parser.add_argument('--api-port', type=int, default=8081, help='port of the Bot API stub')
+    parser.add_argument('--real-redis', action='store_true', help='use the Redis from the configuration '
+                                                                  'instead of fakeredis')
+    parser.add_argument('--no-cache', action='store_true', help='disable the in-process read cache')
+    parser.add_argument('--rate-limits', action='store_true', help='keep the user and Bot API rate limits')
+    parser.add_argument('--metrics', action='store_true', help='print the collected metrics')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(run_benchmark(parse_args()))
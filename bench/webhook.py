@@ -0,0 +1,126 @@
+"""
+Check of the webhook route against a local Telegram Bot API stub.
+
+An update is sent to the webhook application the way Telegram sends it, once with
+the configured secret token, which must be accepted and answered through the stub,
+and once each with a wrong and a missing token, which must be rejected.
+
+Usage:
+    python -m bench.webhook
+"""
+import argparse
+import asyncio
+import time
+
+from aiohttp import ClientSession, web
+
+from bench.fake_telegram import FakeTelegram
+from bench.run import use_fake_redis
+
+# The secret token configured for the check
+SECRET = 'bench-webhook-secret'
+
+
+def _update(update_id: int, user_id: int) -> dict:
+    """
+    Build a /start message update.
+
+    Args:
+        update_id: The ID of the update.
+        user_id: The Telegram ID of the user sending it.
+
+    Returns:
+        The update in the Bot API format.
+    """
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Webhook', 'language_code': 'en'}
+    return {'update_id': update_id, 'message': {'message_id': update_id, 'date': int(time.time()), 'text': '/start',
+                                                 'chat': {'id': user_id, 'type': 'private'}, 'from': user,
+                                                 'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]}}
+
+
+async def _post(session: ClientSession, url: str, update: dict, secret: str | None) -> int:
+    """
+    Send an update to the webhook like Telegram does.
+
+    Args:
+        session: The HTTP client session.
+        url: The URL of the webhook route.
+        update: The update in the Bot API format.
+        secret: The secret token header sent, None to send none.
+
+    Returns:
+        The HTTP status of the response.
+    """
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret is not None else {}
+    async with session.post(url, json=update, headers=headers) as response:
+        return response.status
+
+
+async def check_webhook(args: argparse.Namespace) -> None:
+    """
+    Serve the webhook application and the Bot API stub and send updates to the webhook.
+
+    Args:
+        args: The command line arguments.
+
+    Raises:
+        AssertionError: If the webhook accepts a wrong token, rejects the right one or does not reply.
+    """
+    use_fake_redis()
+
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    import main
+
+    telegram = FakeTelegram()
+    api = web.AppRunner(telegram.create_app())
+    await api.setup()
+    await web.TCPSite(api, host='127.0.0.1', port=args.api_port).start()
+
+    main.bot.session = AiohttpSession(api=TelegramAPIServer.from_base(f'http://127.0.0.1:{args.api_port}'))
+    main.config.webhook.secret = SECRET
+    main.allowlist.users = frozenset([args.user_id])
+    webhook = web.AppRunner(main.create_webhook_app(main._setup_dispatcher()))
+    await webhook.setup()
+    await web.TCPSite(webhook, host='127.0.0.1', port=args.port).start()
+
+    url = f'http://127.0.0.1:{args.port}{main.config.webhook.path}'
+    try:
+        async with ClientSession() as session:
+            statuses = {'valid': await _post(session, url, _update(1, args.user_id), SECRET),
+                        'wrong': await _post(session, url, _update(2, args.user_id), SECRET[::-1]),
+                        'missing': await _post(session, url, _update(3, args.user_id), None)}
+
+        # Updates are handled in the background after the webhook answered
+        for _ in range(50):
+            if telegram.calls.get('sendmessage'):
+                break
+            await asyncio.sleep(0.1)
+    finally:
+        await webhook.cleanup()
+        await main.bot.session.close()
+        await api.cleanup()
+
+    print(f'Webhook responses: {statuses}')
+    print(f'Bot API calls: {telegram.calls}')
+    assert statuses == {'valid': 200, 'wrong': 401, 'missing': 401}, 'the secret token is not checked'
+    assert telegram.calls.get('sendmessage') == 1, 'the accepted update was not answered exactly once'
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse the command line arguments.
+
+    Returns:
+        The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8082, help='port of the webhook server')
+    parser.add_argument('--api-port', type=int, default=8081, help='port of the Bot API stub')
+    parser.add_argument('--user-id', type=int, default=100000, help='Telegram ID of the sending user')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(check_webhook(parse_args()))
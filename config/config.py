@@ -1,4 +1,7 @@
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Set
+
 from environs import Env
 
 
@@ -9,14 +12,23 @@ class TgBot:
 
     Attributes:
         token (str): The token of the Telegram bot.
-        allowed_users (str): The list of allowed user IDs separated by commas.
+        allowed_users (Set[int]): The IDs of the allowed users.
+        allowed_users_key (str): The name of a Redis set with more allowed user IDs, empty to disable it.
+        allowed_users_reload (int): The number of seconds between reloads of the Redis set.
+        admins (Set[int]): The IDs of the users who can see the usage statistics.
         pag_page_size (int): The page size for pagination.
         pag_height (int): The height of the pagination.
+        note_page_length (int): The maximum number of characters of a note shown in one message,
+            longer notes are paged.
     """
     token: str
-    allowed_users: str
+    allowed_users: Set[int]
+    allowed_users_key: str
+    allowed_users_reload: int
+    admins: Set[int]
     pag_page_size: int
     pag_height: int
+    note_page_length: int
 
 
 @dataclass
@@ -28,10 +40,125 @@ class Database:
         host (str): The host address of the database.
         port (int): The port number of the database.
         db_num (int): The database number.
+        socket_path (str): The path of a unix socket to connect through instead of the host and port,
+            empty to use TCP.
+        scan_count (int): The number of elements requested per HSCAN or SCAN call when iterating.
+        max_connections (int): The maximum number of connections of the note data pool.
+        fsm_max_connections (int): The maximum number of connections of a separate FSM state pool,
+            0 shares the note data pool.
+        pool_timeout (float): The number of seconds to wait for a free connection before failing.
+        socket_timeout (float): The number of seconds to wait for a reply.
+        connect_timeout (float): The number of seconds to wait for a connection to be established.
+        retries (int): The number of retries of a command failing with a connection error.
+        retry_backoff (float): The delay before the first retry in seconds, doubled for every next one.
+        retry_backoff_cap (float): The maximum delay between retries in seconds.
+        health_check_interval (int): The number of idle seconds after which a connection is checked
+            with PING before use, 0 disables the checks.
+        compress_threshold (int): The minimum size in bytes of a hash value to be stored compressed,
+            0 disables compression.
+        compress_level (int): The zlib compression level from 1 to 9.
+        fsm_state_ttl (int): The number of seconds the FSM state of an inactive user is kept, 0 keeps it forever.
+        fsm_data_ttl (int): The number of seconds the FSM and dialog data of an inactive user is kept,
+            0 keeps it forever.
     """
     host: str
     port: int
     db_num: int
+    socket_path: str
+    scan_count: int
+    max_connections: int
+    fsm_max_connections: int
+    pool_timeout: float
+    socket_timeout: float
+    connect_timeout: float
+    retries: int
+    retry_backoff: float
+    retry_backoff_cap: float
+    health_check_interval: int
+    compress_threshold: int
+    compress_level: int
+    fsm_state_ttl: int
+    fsm_data_ttl: int
+
+
+@dataclass
+class Webhook:
+    """
+    Dataclass representing webhook mode configuration.
+
+    Attributes:
+        enabled (bool): Whether updates are received through a webhook instead of long polling.
+        base_url (str): The public HTTPS URL Telegram sends updates to, without the path.
+        path (str): The path of the webhook route.
+        secret (str): The secret token Telegram sends in the X-Telegram-Bot-Api-Secret-Token header.
+        host (str): The host address the web server binds to.
+        port (int): The port number the web server binds to.
+    """
+    enabled: bool
+    base_url: str
+    path: str
+    secret: str
+    host: str
+    port: int
+
+
+@dataclass
+class Cache:
+    """
+    Dataclass representing the in-process read cache configuration.
+
+    Attributes:
+        max_entries (int): The maximum number of cached Redis keys, 0 disables the cache.
+        ttl (int): The number of seconds a cached key is kept.
+        max_bytes (int): The approximate memory limit of the cache in bytes.
+    """
+    max_entries: int
+    ttl: int
+    max_bytes: int
+
+
+@dataclass
+class Throttling:
+    """
+    Dataclass representing rate limit configuration.
+
+    Attributes:
+        user_rate (float): The number of updates per second a user may send, 0 disables the limit.
+        user_burst (int): The number of updates a user may send at once after being idle.
+        global_rate (float): The number of Bot API requests per second sent to all chats, 0 disables the limit.
+        chat_rate (float): The number of Bot API requests per second sent to a single chat, 0 disables the limit.
+        chat_burst (int): The number of requests that may be sent to a chat at once after it was idle.
+        max_retries (int): The number of times a request answered with 429 is retried after the requested delay.
+    """
+    user_rate: float
+    user_burst: int
+    global_rate: float
+    chat_rate: float
+    chat_burst: int
+    max_retries: int
+
+
+@dataclass
+class Reminders:
+    """
+    Dataclass representing note reminder configuration.
+
+    Attributes:
+        shards (int): The number of due queues the reminders are spread over, shared among the processes.
+        batch_size (int): The maximum number of due reminders taken from a queue at once.
+        poll_interval (float): The number of seconds between polls of the queues when nothing is due.
+        lease (int): The number of seconds a taken reminder is hidden from the queues, it is delivered
+            again if it is not acknowledged by then.
+        concurrency (int): The maximum number of reminders sent at once by a process.
+        rate (float): The number of reminders per second sent to all chats, taken from the global rate,
+            0 disables the limit.
+    """
+    shards: int
+    batch_size: int
+    poll_interval: float
+    lease: int
+    concurrency: int
+    rate: float
 
 
 @dataclass
@@ -42,11 +169,30 @@ class Config:
     Attributes:
         tg_bot (TgBot): Telegram bot configuration.
         db (Database): Database configuration.
+        webhook (Webhook): Webhook mode configuration.
+        cache (Cache): Read cache configuration.
+        throttling (Throttling): Rate limit configuration.
+        reminders (Reminders): Note reminder configuration.
+        workers (int): The number of worker processes handling updates, 1 handles them in the main process.
+        concurrency (int): The maximum number of updates handled at once by a process.
+        metrics_host (str): The host address the metrics server binds to.
+        metrics_port (int): The port number of the metrics server, 0 disables it. Worker processes
+            use the following port numbers.
         logs_level (str): The logging level.
+        logs_format (str): The format of the log file, text or json.
     """
     tg_bot: TgBot
     db: Database
+    webhook: Webhook
+    cache: Cache
+    throttling: Throttling
+    reminders: Reminders
+    workers: int
+    concurrency: int
+    metrics_host: str
+    metrics_port: int
     logs_level: str
+    logs_format: str
 
 
 def load_config(path: str | None = None) -> Config:
@@ -62,8 +208,57 @@ def load_config(path: str | None = None) -> Config:
     env = Env()
     env.read_env(path)
     return Config(
-        tg_bot=TgBot(token=env('TOKEN'), allowed_users=env('ALLOWED_USERS'),
-                     pag_page_size=int(env('PAGE_SIZE')), pag_height=int(env('HEIGHT'))),
-        db=Database(host=env('DB_HOST'), port=int(env('DB_PORT')), db_num=int(env('DB_NUMBER'))),
-        logs_level=env('LOGS_LEVEL')
+        tg_bot=TgBot(token=env('TOKEN'), allowed_users=set(env.list('ALLOWED_USERS', subcast=int)),
+                     allowed_users_key=env('ALLOWED_USERS_KEY', ''),
+                     allowed_users_reload=env.int('ALLOWED_USERS_RELOAD', 30),
+                     admins=set(env.list('ADMINS', [], subcast=int)),
+                     pag_page_size=int(env('PAGE_SIZE')), pag_height=int(env('HEIGHT')),
+                     note_page_length=env.int('NOTE_PAGE_LENGTH', 3000)),
+        db=Database(host=env('DB_HOST'), port=int(env('DB_PORT')), db_num=int(env('DB_NUMBER')),
+                    socket_path=env('DB_SOCKET_PATH', ''), scan_count=env.int('DB_SCAN_COUNT', 100),
+                    max_connections=env.int('DB_MAX_CONNECTIONS', 50),
+                    fsm_max_connections=env.int('DB_FSM_MAX_CONNECTIONS', 0),
+                    pool_timeout=env.float('DB_POOL_TIMEOUT', 5.0),
+                    socket_timeout=env.float('DB_SOCKET_TIMEOUT', 5.0),
+                    connect_timeout=env.float('DB_CONNECT_TIMEOUT', 2.0),
+                    retries=env.int('DB_RETRIES', 3),
+                    retry_backoff=env.float('DB_RETRY_BACKOFF', 0.05),
+                    retry_backoff_cap=env.float('DB_RETRY_BACKOFF_CAP', 1.0),
+                    health_check_interval=env.int('DB_HEALTH_CHECK_INTERVAL', 30),
+                    compress_threshold=env.int('DB_COMPRESS_THRESHOLD', 512),
+                    compress_level=env.int('DB_COMPRESS_LEVEL', 6),
+                    fsm_state_ttl=env.int('DB_FSM_STATE_TTL', 30 * 24 * 3600),
+                    fsm_data_ttl=env.int('DB_FSM_DATA_TTL', 30 * 24 * 3600)),
+        webhook=Webhook(enabled=env.bool('WEBHOOK_ENABLED', False), base_url=env('WEBHOOK_BASE_URL', ''),
+                        path=env('WEBHOOK_PATH', '/webhook'), secret=env('WEBHOOK_SECRET', ''),
+                        host=env('WEBHOOK_HOST', '0.0.0.0'), port=env.int('WEBHOOK_PORT', 8080)),
+        cache=Cache(max_entries=env.int('CACHE_MAX_ENTRIES', 1024), ttl=env.int('CACHE_TTL', 60),
+                    max_bytes=env.int('CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+        throttling=Throttling(user_rate=env.float('THROTTLE_RATE', 2.0), user_burst=env.int('THROTTLE_BURST', 10),
+                              global_rate=env.float('FLOOD_GLOBAL_RATE', 30.0),
+                              chat_rate=env.float('FLOOD_CHAT_RATE', 1.0), chat_burst=env.int('FLOOD_CHAT_BURST', 5),
+                              max_retries=env.int('FLOOD_MAX_RETRIES', 3)),
+        reminders=Reminders(shards=env.int('REMINDER_SHARDS', 16), batch_size=env.int('REMINDER_BATCH_SIZE', 50),
+                            poll_interval=env.float('REMINDER_POLL_INTERVAL', 1.0),
+                            lease=env.int('REMINDER_LEASE', 60), concurrency=env.int('REMINDER_CONCURRENCY', 100),
+                            rate=env.float('REMINDER_RATE', 10.0)),
+        workers=env.int('WORKERS', 1),
+        concurrency=env.int('CONCURRENCY', 100),
+        metrics_host=env('METRICS_HOST', '127.0.0.1'),
+        metrics_port=env.int('METRICS_PORT', 0),
+        logs_level=env('LOGS_LEVEL'),
+        logs_format=env('LOGS_FORMAT', 'text')
     )
+
+
+@lru_cache(maxsize=None)
+def get_config() -> Config:
+    """
+    Get the configuration of the process, loading it from environment variables on the first call.
+
+    Every module shares the same object, so the .env file is read and parsed only once.
+
+    Returns:
+        Config: The loaded configuration object.
+    """
+    return load_config()
@@ -1 +1,6 @@
-from database.database import redis, DBInterface
+from database.database import redis, fsm_redis, cache, create_queue_client, Batch, DBInterface
+from database.fsm_storage import CompactRedisStorage
+from database.notes_index import NoteMeta, NotesIndex
+from database.reminders import Reminder, Reminders
+from database.search_index import SearchIndex
+from database.stats import Stats, Summary, UserStats
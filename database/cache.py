@@ -0,0 +1,241 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Mapping
+
+# Sentinel returned by ReadCache.get when nothing is cached
+MISSING = object()
+
+
+def _sizeof(value: Any) -> int:
+    """
+    Roughly estimate the memory taken by a cached Redis reply.
+
+    Args:
+        value: The cached value.
+
+    Returns:
+        The approximate size in bytes.
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, Mapping):
+        return sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_sizeof(item) for item in value)
+    return 8
+
+
+class _Entry:
+    """
+    Cached replies for a single Redis key.
+    """
+    __slots__ = ('values', 'size', 'expires_at')
+
+    def __init__(self, expires_at: float) -> None:
+        self.values: Dict[Hashable, Any] = {}
+        self.size = 0
+        self.expires_at = expires_at
+
+
+class ReadCache:
+    """
+    An in-process LRU cache of Redis replies grouped by key name.
+
+    Every user's notes live under their own keys, so each entry holds the replies
+    read for one user's hash or index. Entries expire after a TTL and the least
+    recently used ones are evicted when the entry count or memory limit is exceeded.
+    Writes go through update_fields, remove_fields and invalidate.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int) -> None:
+        """
+        Args:
+            max_entries: The maximum number of cached keys, 0 disables the cache.
+            ttl: Seconds after which a cached key is read from Redis again.
+            max_bytes: The approximate memory limit for all cached replies.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def _entry(self, name: str, create: bool = False) -> _Entry | None:
+        """
+        Get the live entry for a key and mark it as recently used.
+
+        Args:
+            name: The name of the Redis key.
+            create: Create an empty entry if there is none.
+
+        Returns:
+            The entry, or None if it is not cached.
+        """
+        entry = self._entries.get(name)
+        now = time.monotonic()
+
+        if entry is not None and entry.expires_at <= now:
+            self._drop(name)
+            entry = None
+
+        if entry is None and create:
+            entry = self._entries[name] = _Entry(now + self.ttl)
+        if entry is not None:
+            self._entries.move_to_end(name)
+        return entry
+
+    def _drop(self, name: str) -> None:
+        """
+        Remove the entry for a key.
+
+        Args:
+            name: The name of the Redis key.
+        """
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def _put(self, entry: _Entry, key: Hashable, value: Any) -> None:
+        """
+        Store a reply in an entry, keeping the size accounting up to date.
+
+        Args:
+            entry: The entry of the Redis key.
+            key: The identifier of the read operation.
+            value: The reply to be stored.
+        """
+        self._pop(entry, key)
+        size = _sizeof(key) + _sizeof(value)
+        entry.values[key] = value
+        entry.size += size
+        self.size += size
+
+    def _pop(self, entry: _Entry, key: Hashable) -> None:
+        """
+        Remove a reply from an entry, keeping the size accounting up to date.
+
+        Args:
+            entry: The entry of the Redis key.
+            key: The identifier of the read operation.
+        """
+        if key in entry.values:
+            size = _sizeof(key) + _sizeof(entry.values.pop(key))
+            entry.size -= size
+            self.size -= size
+
+    def _shrink(self) -> None:
+        """
+        Evict the least recently used entries until the limits are respected.
+        """
+        while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get(self, name: str, key: Hashable) -> Any:
+        """
+        Get a cached reply.
+
+        Args:
+            name: The name of the Redis key.
+            key: The identifier of the read operation.
+
+        Returns:
+            The cached reply, or MISSING if it is not cached.
+        """
+        entry = self._entry(name)
+        if entry is not None and key in entry.values:
+            self.hits += 1
+            return entry.values[key]
+        self.misses += 1
+        return MISSING
+
+    def set(self, name: str, key: Hashable, value: Any, writes: int) -> None:
+        """
+        Cache a reply read from Redis.
+
+        The reply is discarded if any write went through the cache while it was being
+        read, since it may already be outdated.
+
+        Args:
+            name: The name of the Redis key.
+            key: The identifier of the read operation.
+            value: The reply to be cached.
+            writes: The value of the writes counter taken before the read.
+        """
+        if not self.max_entries or writes != self.writes:
+            return
+        self._put(self._entry(name, create=True), key, value)
+        self._shrink()
+
+    def update_fields(self, name: str, mapping: Mapping[str, Any]) -> None:
+        """
+        Write new hash field values through to the cache.
+
+        Replies for single fields are updated, replies covering the whole hash are dropped.
+
+        Args:
+            name: The name of the hash.
+            mapping: The field-value pairs written to the hash.
+        """
+        self.writes += 1
+        entry = self._entry(name)
+        if entry is None:
+            return
+        self._drop_aggregates(entry)
+        for field, value in mapping.items():
+            if isinstance(value, bytes):
+                value = value.decode()
+            self._put(entry, ('hget', field), str(value))
+            self._put(entry, ('hexists', field), True)
+        self._shrink()
+
+    def remove_fields(self, name: str, fields: Iterable[str]) -> None:
+        """
+        Reflect deleted hash fields in the cache.
+
+        Args:
+            name: The name of the hash.
+            fields: The fields deleted from the hash.
+        """
+        self.writes += 1
+        entry = self._entry(name)
+        if entry is None:
+            return
+        self._drop_aggregates(entry)
+        for field in fields:
+            self._put(entry, ('hget', field), None)
+            self._put(entry, ('hexists', field), False)
+
+    def _drop_aggregates(self, entry: _Entry) -> None:
+        """
+        Remove replies that depend on the whole hash, such as its length or keys.
+
+        Args:
+            entry: The entry of the hash.
+        """
+        for key in [key for key in entry.values if key[0] not in ('hget', 'hexists')]:
+            self._pop(entry, key)
+
+    def invalidate(self, name: str) -> None:
+        """
+        Drop every cached reply for a Redis key.
+
+        Args:
+            name: The name of the Redis key.
+        """
+        self.writes += 1
+        self._drop(name)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            A dictionary with hits, misses, evictions, cached keys and approximate size.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._entries), 'bytes': self.size}
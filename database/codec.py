@@ -0,0 +1,67 @@
+import zlib
+from typing import Any, Callable, Dict
+
+# First byte of an encoded value, it never occurs in UTF-8 text, so plain values are told apart
+HEADER = 0xFF
+
+# The same byte after a reply is decoded with the surrogateescape error handler
+DECODED_HEADER = '\udcff'
+
+# Codec versions written in the second byte of an encoded value
+ZLIB = 1
+
+DECOMPRESSORS: Dict[int, Callable[[bytes], bytes]] = {
+    ZLIB: zlib.decompress,
+}
+
+
+def encode_value(value: Any, threshold: int, level: int) -> Any:
+    """
+    Compress a text value for storage if it is long enough and compresses well.
+
+    An encoded value is the header byte, the codec version and the compressed UTF-8 text.
+    Values of other types, short texts and texts that do not get shorter are stored as is.
+
+    Args:
+        value: The value to be stored.
+        threshold: The minimum size of the text in bytes to be compressed, 0 disables compression.
+        level: The zlib compression level.
+
+    Returns:
+        The bytes of the encoded value, or the value unchanged.
+    """
+    if not threshold or not isinstance(value, str):
+        return value
+
+    raw = value.encode()
+    if len(raw) < threshold:
+        return value
+
+    encoded = bytes((HEADER, ZLIB)) + zlib.compress(raw, level)
+    return encoded if len(encoded) < len(raw) else value
+
+
+def decode_value(value: Any) -> Any:
+    """
+    Restore a value read from Redis, leaving plain values written before compression untouched.
+
+    The client decodes replies with the surrogateescape error handler, so the original bytes
+    of an encoded value can be recovered from the string.
+
+    Args:
+        value: The value read from Redis.
+
+    Returns:
+        The stored text, or the value unchanged.
+
+    Raises:
+        ValueError: If the value was written with an unknown codec version.
+    """
+    if not isinstance(value, str) or not value.startswith(DECODED_HEADER):
+        return value
+
+    raw = value.encode('utf-8', 'surrogateescape')
+    decompress = DECOMPRESSORS.get(raw[1])
+    if decompress is None:
+        raise ValueError(f'Unknown codec version {raw[1]}')
+    return decompress(raw[2:]).decode()
@@ -1,21 +1,446 @@
-from typing import Union, Dict, List, Any
+from functools import partial
+from types import TracebackType
+from typing import Union, Dict, List, Any, AsyncIterator, Awaitable, Callable, Hashable, Set, Tuple, Type
 
 from redis.asyncio.client import Redis
+from redis.commands.core import AsyncScript
+from redis.asyncio.connection import BlockingConnectionPool, Connection, UnixDomainSocketConnection
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis import exceptions as redis_errors
 
-from config.config import Config, load_config
+from config.config import Config, Database, get_config
+from database.cache import MISSING, ReadCache
+from database.codec import decode_value, encode_value
+from utils.metrics import Gauges, db_errors, db_seconds, registry, timed_methods
 
 # Load configuration
-config: Config = load_config()
+config: Config = get_config()
 
-# Initialize Redis client
-redis = Redis(host=config.db.host, port=config.db.port, db=config.db.db_num, decode_responses=True)
 
+def _create_client(db: Database, max_connections: int, socket_timeout: float | None = None) -> Redis:
+    """
+    Create a Redis client with its own blocking connection pool.
+
+    When every connection is busy, a command waits for a free one up to the pool timeout
+    instead of opening more connections, and commands failing with a connection error
+    are retried with exponential backoff. Timeouts are not retried, since the server may
+    have run the command already and writes like RPUSH or HINCRBY would be applied twice.
+    Replies are decoded with the surrogateescape error handler, so compressed values
+    survive as strings.
+
+    Args:
+        db: The database configuration.
+        max_connections: The maximum number of connections of the pool.
+        socket_timeout: The number of seconds to wait for a reply, the configured one if None.
+
+    Returns:
+        The Redis client.
+    """
+    if db.socket_path:
+        address = {'connection_class': UnixDomainSocketConnection, 'path': db.socket_path}
+    else:
+        address = {'connection_class': Connection, 'host': db.host, 'port': db.port}
+
+    pool = BlockingConnectionPool(
+        max_connections=max_connections, timeout=db.pool_timeout, db=db.db_num, decode_responses=True,
+        socket_timeout=socket_timeout or db.socket_timeout, socket_connect_timeout=db.connect_timeout,
+        retry=Retry(ExponentialBackoff(cap=db.retry_backoff_cap, base=db.retry_backoff), db.retries,
+                    supported_errors=(redis_errors.ConnectionError,)),
+        retry_on_error=[redis_errors.ConnectionError], health_check_interval=db.health_check_interval,
+        encoding_errors='surrogateescape', **address)
+    return Redis(connection_pool=pool)
+
+
+def _pool_stats(client: Redis) -> Dict[str, int]:
+    """
+    Read the usage of the connection pool of a client.
+
+    Args:
+        client: The Redis client.
+
+    Returns:
+        A dictionary with the numbers of open, busy and maximum connections.
+    """
+    pool: BlockingConnectionPool = client.connection_pool
+    return {'open': len(pool._connections), 'in_use': pool.max_connections - pool.pool.qsize(),
+            'max': pool.max_connections}
+
+
+def create_queue_client(pop_timeout: float) -> Redis:
+    """
+    Create a Redis client for the blocking pops of a worker queue.
+
+    Its single connection waits for a reply as long as a pop blocks on top of the socket
+    timeout of the other clients, so an idle BLPOP is answered by the server rather than
+    cut off by the client, which would lose an update popped just as the socket timed out.
+
+    Args:
+        pop_timeout: The number of seconds a pop blocks for.
+
+    Returns:
+        The Redis client.
+    """
+    return _create_client(config.db, 1, socket_timeout=pop_timeout + config.db.socket_timeout)
+
+
+# Initialize Redis clients for note data and, if configured, for FSM state
+redis = _create_client(config.db, config.db.max_connections)
+fsm_redis = _create_client(config.db, config.db.fsm_max_connections) if config.db.fsm_max_connections else redis
+
+# Expose the connection pool usage
+registry.register(Gauges('notebot_redis_data_pool', 'Connections of the note data pool.',
+                         read=partial(_pool_stats, redis)))
+if fsm_redis is not redis:
+    registry.register(Gauges('notebot_redis_fsm_pool', 'Connections of the FSM state pool.',
+                             read=partial(_pool_stats, fsm_redis)))
+
+# Lua scripts registered with the client, by source
+_scripts: Dict[str, AsyncScript] = {}
+
+# Initialize the in-process read cache
+cache = ReadCache(max_entries=config.cache.max_entries, ttl=config.cache.ttl, max_bytes=config.cache.max_bytes)
+
+# Expose the cache counters
+registry.register(Gauges('notebot_cache', 'Read cache counter.', kind='counter',
+                         read=lambda: {key: cache.stats()[key] for key in ('hits', 'misses', 'evictions')}))
+registry.register(Gauges('notebot_cache', 'Read cache size.',
+                         read=lambda: {key: cache.stats()[key] for key in ('entries', 'bytes')}))
+
+
+def _encode(mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compress the long values of a hash mapping with the configured codec.
+
+    Args:
+        mapping: A dictionary of field-value pairs to be written.
+
+    Returns:
+        A dictionary of field-value pairs as they are stored.
+    """
+    return {field: encode_value(value, config.db.compress_threshold, config.db.compress_level)
+            for field, value in mapping.items()}
+
+
+def _decode(value: Any) -> Any:
+    """
+    Restore the compressed values in the reply of a hash read.
+
+    Args:
+        value: The reply holding a value, a list or a dictionary of values.
+
+    Returns:
+        The reply with the stored texts.
+    """
+    if isinstance(value, dict):
+        return {field: decode_value(item) for field, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return decode_value(value)
+
+
+async def _read_through(name: str, key: Hashable, read: Callable[[], Awaitable[Any]], decode: bool = False) -> Any:
+    """
+    Return a cached reply or read it from Redis and cache it.
+
+    Args:
+        name: The name of the Redis key.
+        key: The identifier of the read operation.
+        read: A function performing the Redis read.
+        decode: Restore the compressed hash values in the reply before caching it.
+
+    Returns:
+        The reply of the read operation.
+    """
+    value = cache.get(name, key)
+    if value is MISSING:
+        writes = cache.writes
+        value = await read()
+        if decode:
+            value = _decode(value)
+        cache.set(name, key, value, writes)
+    return value
+
+
+class Batch:
+    """
+    A unit of work queuing Redis writes to be sent in a single round trip.
+
+    The commands are flushed as one pipeline, optionally wrapped in MULTI/EXEC, when the
+    outermost async with block exits without an exception, and discarded otherwise.
+    Entering the same batch again from a nested call only queues more commands, so
+    functions accepting an optional batch can join the one of their caller.
+    The read cache is updated once the pipeline has been executed.
+    """
+
+    def __init__(self, transaction: bool = False) -> None:
+        """
+        Args:
+            transaction: Execute the commands atomically in a MULTI/EXEC block.
+        """
+        self.transaction = transaction
+        self.commands: List[Tuple[str, tuple, Dict[str, Any]]] = []
+        self.upkeep: List[Callable[[], None]] = []
+        self.results: List[Any] = []
+        self._depth = 0
+
+    async def __aenter__(self) -> 'Batch':
+        """
+        Enter the batch, nesting into an already entered one.
+
+        Returns:
+            The batch itself.
+        """
+        self._depth += 1
+        return self
+
+    async def __aexit__(self, exc_type: Type[BaseException] | None, exc: BaseException | None,
+                        traceback: TracebackType | None) -> None:
+        """
+        Execute the queued commands when the outermost block exits, unless it raised.
+
+        Args:
+            exc_type: The type of the exception raised in the block, if any.
+            exc: The exception raised in the block, if any.
+            traceback: The traceback of the exception, if any.
+        """
+        self._depth -= 1
+        if self._depth:
+            return
+        if exc_type is None:
+            self.results = await DBInterface.execute(self)
+        self.commands.clear()
+        self.upkeep.clear()
+
+    def _queue(self, command: str, *args: Any, upkeep: Callable[[], None] | None = None, **kwargs: Any) -> 'Batch':
+        """
+        Queue a command of the pipeline.
+
+        Args:
+            command: The name of the redis-py client method.
+            *args: The positional arguments of the command.
+            upkeep: A function updating the read cache after the command is executed.
+            **kwargs: The keyword arguments of the command.
+
+        Returns:
+            The batch itself, so calls can be chained.
+        """
+        self.commands.append((command, args, kwargs))
+        if upkeep:
+            self.upkeep.append(upkeep)
+        return self
+
+    def set_data(self, name: str, value: Union[str, bytes, int, float]) -> 'Batch':
+        """
+        Queue setting a value.
+
+        Args:
+            name: The name of the key.
+            value: The value to be set.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('set', name=name, value=value, upkeep=lambda: cache.invalidate(name))
+
+    def incr(self, name: str, amount: int = 1) -> 'Batch':
+        """
+        Queue incrementing a counter.
+
+        Args:
+            name: The name of the key.
+            amount: The value added to the counter.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('incrby', name=name, amount=amount, upkeep=lambda: cache.invalidate(name))
+
+    def hset_data(self, name: str, mapping: Dict[str, Union[str, bytes, int, float]]) -> 'Batch':
+        """
+        Queue setting multiple fields in a hash.
 
+        Args:
+            name: The name of the hash.
+            mapping: A dictionary of field-value pairs to be set in the hash.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('hset', name=name, mapping=_encode(mapping),
+                           upkeep=lambda: cache.update_fields(name, mapping))
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> 'Batch':
+        """
+        Queue incrementing a counter in a hash.
+
+        Args:
+            name: The name of the hash.
+            key: The field holding the counter.
+            amount: The value added to the counter.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('hincrby', name=name, key=key, amount=amount, upkeep=lambda: cache.invalidate(name))
+
+    def hdel(self, name: str, keys: List[str]) -> 'Batch':
+        """
+        Queue deleting hash fields.
+
+        Args:
+            name: The name of the hash.
+            keys: A list of keys to be deleted from the hash.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('hdel', name, *keys, upkeep=lambda: cache.remove_fields(name, keys))
+
+    def sadd(self, name: str, members: List[str]) -> 'Batch':
+        """
+        Queue adding members to a set.
+
+        Args:
+            name: The name of the set.
+            members: A list of members to be added.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('sadd', name, *members)
+
+    def srem(self, name: str, members: List[str]) -> 'Batch':
+        """
+        Queue removing members from a set.
+
+        Args:
+            name: The name of the set.
+            members: A list of members to be removed.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('srem', name, *members)
+
+    def zadd(self, name: str, mapping: Dict[str, Union[int, float]], nx: bool = False) -> 'Batch':
+        """
+        Queue adding members with scores to a sorted set.
+
+        Args:
+            name: The name of the sorted set.
+            mapping: A dictionary of member-score pairs to be added.
+            nx: Only add new members, never update the scores of existing ones.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('zadd', name=name, mapping=mapping, nx=nx, upkeep=lambda: cache.invalidate(name))
+
+    def zincrby(self, name: str, member: str, amount: float = 1) -> 'Batch':
+        """
+        Queue incrementing the score of a member of a sorted set.
+
+        Args:
+            name: The name of the sorted set.
+            member: The member whose score is incremented, it is added if it does not exist.
+            amount: The value added to the score.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('zincrby', name=name, amount=amount, value=member, upkeep=lambda: cache.invalidate(name))
+
+    def zrem(self, name: str, members: List[str]) -> 'Batch':
+        """
+        Queue removing members from a sorted set.
+
+        Args:
+            name: The name of the sorted set.
+            members: A list of members to be removed.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('zrem', name, *members, upkeep=lambda: cache.invalidate(name))
+
+    def expire(self, name: str, seconds: int) -> 'Batch':
+        """
+        Queue setting a timeout on a key.
+
+        Args:
+            name: The name of the key.
+            seconds: The number of seconds after which the key is deleted.
+
+        Returns:
+            The batch itself.
+        """
+        return self._queue('expire', name=name, time=seconds)
+
+    def delete(self, names: List[str]) -> 'Batch':
+        """
+        Queue deleting keys.
+
+        Args:
+            names: A list of keys to be deleted.
+
+        Returns:
+            The batch itself.
+        """
+        def upkeep() -> None:
+            for name in names:
+                cache.invalidate(name)
+
+        return self._queue('delete', *names, upkeep=upkeep)
+
+
+@timed_methods(db_seconds, db_errors)
 class DBInterface:
     """
     A static class to interface with a Redis database asynchronously.
+
+    Hash and sorted set reads are served from the in-process read cache when possible,
+    writes update or invalidate the cached replies of the key they touch.
+    Long hash values are compressed on write and restored on read.
+    Every operation is timed in the notebot_db_seconds histogram.
+    Writes spanning several keys can be queued in a batch and sent in one round trip.
     """
 
+    @staticmethod
+    def batch(batch: Batch | None = None, transaction: bool = False) -> Batch:
+        """
+        Start a batch of writes, or join an existing one.
+
+        Args:
+            batch: The batch of the caller, if there is one.
+            transaction: Execute a new batch atomically in a MULTI/EXEC block.
+
+        Returns:
+            The batch to queue the writes in.
+        """
+        return batch or Batch(transaction)
+
+    @staticmethod
+    async def execute(batch: Batch) -> List[Any]:
+        """
+        Send the queued commands of a batch as a single pipeline.
+
+        Args:
+            batch: The batch to be executed.
+
+        Returns:
+            A list of the replies of the commands in their order.
+        """
+        if not batch.commands:
+            return []
+        async with redis.pipeline(transaction=batch.transaction) as pipe:
+            for command, args, kwargs in batch.commands:
+                getattr(pipe, command)(*args, **kwargs)
+            results = await pipe.execute()
+        for upkeep in batch.upkeep:
+            upkeep()
+        return results
+
     @staticmethod
     async def set_data(name: Union[str, memoryview, bytes],
                        value: Union[str, bytes, int, float, memoryview]) -> Any:
@@ -29,19 +454,24 @@ class DBInterface:
         Returns:
             The result of the Redis set operation.
         """
-        return await redis.set(name=name, value=value)
+        result = await redis.set(name=name, value=value)
+        cache.invalidate(name)
+        return result
 
     @staticmethod
-    async def get_data(name: Union[str, memoryview, bytes]) -> Any:
+    async def get_data(name: Union[str, memoryview, bytes], cached: bool = False) -> Any:
         """
         Get a value from Redis.
 
         Args:
             name: The name of the key.
+            cached: Serve the value from the read cache, for keys only changed through DBInterface.
 
         Returns:
             The value associated with the key.
         """
+        if cached:
+            return await _read_through(name, ('get',), lambda: redis.get(name=name))
         return await redis.get(name=name)
 
     @staticmethod
@@ -57,7 +487,9 @@ class DBInterface:
         Returns:
             The length of the string after the append operation.
         """
-        return await redis.append(key=key, value=value)
+        length = await redis.append(key=key, value=value)
+        cache.invalidate(key)
+        return length
 
     @staticmethod
     async def hset_data(name: str, mapping: Dict[str, Union[str, bytes, int, float, memoryview]]) -> int:
@@ -71,7 +503,9 @@ class DBInterface:
         Returns:
             The number of fields that were added.
         """
-        return await redis.hset(name=name, mapping=mapping)
+        added = await redis.hset(name=name, mapping=_encode(mapping))
+        cache.update_fields(name, mapping)
+        return added
 
     @staticmethod
     async def hget_all(name: str) -> Dict[str, Union[str, bytes, int, float, memoryview]]:
@@ -84,7 +518,164 @@ class DBInterface:
         Returns:
             A dictionary of field-value pairs stored in the hash.
         """
-        return await redis.hgetall(name=name)
+        return await _read_through(name, ('hgetall',), lambda: redis.hgetall(name=name), decode=True)
+
+    @staticmethod
+    async def hget(name: str, key: str, cached: bool = True) -> Union[str, None]:
+        """
+        Get the value of a single field in a hash from Redis.
+
+        Args:
+            name: The name of the hash.
+            key: The field to be read.
+            cached: Serve the value from the read cache, background jobs read past it so they
+                neither evict the replies of active users nor see outdated ones.
+
+        Returns:
+            The value of the field, or None if it does not exist.
+        """
+        if not cached:
+            return _decode(await redis.hget(name=name, key=key))
+        return await _read_through(name, ('hget', key), lambda: redis.hget(name=name, key=key), decode=True)
+
+    @staticmethod
+    async def hmget(name: str, keys: List[str]) -> List[Union[str, None]]:
+        """
+        Get the values of several fields in a hash from Redis.
+
+        Args:
+            name: The name of the hash.
+            keys: A list of fields to be read.
+
+        Returns:
+            A list of values in the order of the fields, with None for missing ones.
+        """
+        return await _read_through(name, ('hmget', tuple(keys)), lambda: redis.hmget(name, keys), decode=True)
+
+    @staticmethod
+    async def hexists(name: str, key: str) -> bool:
+        """
+        Check whether a field exists in a hash in Redis.
+
+        Args:
+            name: The name of the hash.
+            key: The field to be checked.
+
+        Returns:
+            True if the field exists, False otherwise.
+        """
+        return await _read_through(name, ('hexists', key), lambda: redis.hexists(name=name, key=key))
+
+    @staticmethod
+    async def hlen(name: str) -> int:
+        """
+        Get the number of fields in a hash in Redis.
+
+        Args:
+            name: The name of the hash.
+
+        Returns:
+            The number of fields stored in the hash.
+        """
+        return await _read_through(name, ('hlen',), lambda: redis.hlen(name=name))
+
+    @staticmethod
+    async def hscan(name: str, cursor: int = 0, count: int | None = None) -> Tuple[int, Dict[str, str]]:
+        """
+        Read a portion of the fields and values of a hash from Redis.
+
+        The reply is never cached, since it depends on the cursor position.
+
+        Args:
+            name: The name of the hash.
+            cursor: The cursor returned by the previous call, 0 to start a new iteration.
+            count: A hint of how many fields to return.
+
+        Returns:
+            The cursor for the next call, 0 when the iteration is complete,
+            and a dictionary of the field-value pairs read.
+        """
+        cursor, batch = await redis.hscan(name=name, cursor=cursor, count=count)
+        return cursor, _decode(batch)
+
+    @staticmethod
+    async def hscan_batches(name: str, count: int | None = None) -> AsyncIterator[Dict[str, str]]:
+        """
+        Iterate over a hash in Redis in batches with HSCAN.
+
+        Only one batch is held in memory at a time and Redis is never blocked by
+        reading the whole hash at once. Fields changed during the iteration may be
+        missed or returned twice.
+
+        Args:
+            name: The name of the hash.
+            count: A hint of how many fields to read per call, the configured scan count by default.
+
+        Yields:
+            Dictionaries of field-value pairs.
+        """
+        cursor = 0
+        while True:
+            cursor, batch = await DBInterface.hscan(name, cursor, count=count or config.db.scan_count)
+            if batch:
+                yield batch
+            if not cursor:
+                break
+
+    @staticmethod
+    async def hscan_iter(name: str, count: int | None = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Iterate over the fields and values of a hash in Redis with HSCAN.
+
+        Args:
+            name: The name of the hash.
+            count: A hint of how many fields to read per call, the configured scan count by default.
+
+        Yields:
+            Field-value pairs.
+        """
+        async for batch in DBInterface.hscan_batches(name, count):
+            for item in batch.items():
+                yield item
+
+    @staticmethod
+    async def scan(cursor: int, match: str, count: int | None = None,
+                   key_type: str | None = None) -> Tuple[int, List[str]]:
+        """
+        Read a portion of the key names in Redis matching a pattern.
+
+        Args:
+            cursor: The cursor returned by the previous call, 0 to start a new iteration.
+            match: The glob-style pattern of the key names.
+            count: A hint of how many keys to check, the configured scan count by default.
+            key_type: The type of the keys returned, like hash or zset, all types if None.
+
+        Returns:
+            The cursor for the next call, 0 when the iteration is complete,
+            and a list of the key names read.
+        """
+        return await redis.scan(cursor=cursor, match=match, count=count or config.db.scan_count, _type=key_type)
+
+    @staticmethod
+    async def scan_iter(match: str, count: int | None = None, key_type: str | None = None) -> AsyncIterator[str]:
+        """
+        Iterate over the key names in Redis matching a pattern with SCAN.
+
+        Args:
+            match: The glob-style pattern of the key names.
+            count: A hint of how many keys to check per call, the configured scan count by default.
+            key_type: The type of the keys returned, like hash or zset, all types if None.
+
+        Yields:
+            Key names.
+        """
+        cursor = 0
+        while True:
+            cursor, keys = await DBInterface.scan(cursor, match, count, key_type)
+            for key in keys:
+                yield key
+            if not cursor:
+                break
 
     @staticmethod
     async def hdel(name: str, keys: List[Union[str, memoryview, bytes]]) -> int:
@@ -98,4 +689,179 @@ class DBInterface:
         Returns:
             The number of fields that were removed.
         """
-        return await redis.hdel(name, *keys)
+        removed = await redis.hdel(name, *keys)
+        cache.remove_fields(name, keys)
+        return removed
+
+    @staticmethod
+    async def hkeys(name: str) -> List[str]:
+        """
+        Get all the field names in a hash from Redis.
+
+        Args:
+            name: The name of the hash.
+
+        Returns:
+            A list of field names stored in the hash.
+        """
+        return await _read_through(name, ('hkeys',), lambda: redis.hkeys(name=name))
+
+    @staticmethod
+    async def zadd(name: str, mapping: Dict[str, Union[int, float]], nx: bool = False) -> int:
+        """
+        Add members with scores to a sorted set in Redis.
+
+        Args:
+            name: The name of the sorted set.
+            mapping: A dictionary of member-score pairs to be added.
+            nx: Only add new members, never update the scores of existing ones.
+
+        Returns:
+            The number of members that were added.
+        """
+        added = await redis.zadd(name=name, mapping=mapping, nx=nx)
+        cache.invalidate(name)
+        return added
+
+    @staticmethod
+    async def zrange(name: str, start: int, end: int) -> List[str]:
+        """
+        Get a range of members from a sorted set in Redis, ordered by score.
+
+        Args:
+            name: The name of the sorted set.
+            start: The index of the first member (inclusive).
+            end: The index of the last member (inclusive).
+
+        Returns:
+            A list of members in the requested range.
+        """
+        return await _read_through(name, ('zrange', start, end),
+                                   lambda: redis.zrange(name=name, start=start, end=end))
+
+    @staticmethod
+    async def zcard(name: str) -> int:
+        """
+        Get the number of members in a sorted set in Redis.
+
+        Args:
+            name: The name of the sorted set.
+
+        Returns:
+            The number of members in the sorted set.
+        """
+        return await _read_through(name, ('zcard',), lambda: redis.zcard(name=name))
+
+    @staticmethod
+    async def zrem(name: str, members: List[str]) -> int:
+        """
+        Remove one or more members from a sorted set in Redis.
+
+        Args:
+            name: The name of the sorted set.
+            members: A list of members to be removed.
+
+        Returns:
+            The number of members that were removed.
+        """
+        removed = await redis.zrem(name, *members)
+        cache.invalidate(name)
+        return removed
+
+    @staticmethod
+    async def zscore(name: str, member: str) -> float | None:
+        """
+        Get the score of a member of a sorted set in Redis.
+
+        The reply is never cached, so it can be used on sorted sets changed by scripts.
+
+        Args:
+            name: The name of the sorted set.
+            member: The member whose score is read.
+
+        Returns:
+            The score of the member, or None if it is not in the sorted set.
+        """
+        return await redis.zscore(name=name, value=member)
+
+    @staticmethod
+    async def zrevrange(name: str, start: int, end: int) -> List[str]:
+        """
+        Get a range of members from a sorted set in Redis, ordered from the highest score.
+
+        Args:
+            name: The name of the sorted set.
+            start: The index of the first member (inclusive).
+            end: The index of the last member (inclusive).
+
+        Returns:
+            A list of members in the requested range.
+        """
+        return await _read_through(name, ('zrevrange', start, end),
+                                   lambda: redis.zrevrange(name=name, start=start, end=end))
+
+    @staticmethod
+    async def zinterstore(dest: str, keys: List[str], aggregate: str = 'SUM') -> int:
+        """
+        Store the intersection of several sorted sets in Redis.
+
+        Args:
+            dest: The name of the sorted set the result is stored in.
+            keys: A list of sorted sets to be intersected.
+            aggregate: How the scores of a member are combined: SUM, MIN or MAX.
+
+        Returns:
+            The number of members in the resulting sorted set.
+        """
+        count = await redis.zinterstore(dest=dest, keys=keys, aggregate=aggregate)
+        cache.invalidate(dest)
+        return count
+
+    @staticmethod
+    async def expire(name: str, seconds: int) -> bool:
+        """
+        Set a timeout on a key in Redis.
+
+        Args:
+            name: The name of the key.
+            seconds: The number of seconds after which the key is deleted.
+
+        Returns:
+            True if the timeout was set, False if the key does not exist.
+        """
+        return await redis.expire(name=name, time=seconds)
+
+    @staticmethod
+    async def smembers(name: str) -> Set[str]:
+        """
+        Get all the members of a set in Redis.
+
+        The reply is never cached, so changes made by other clients are seen immediately.
+
+        Args:
+            name: The name of the set.
+
+        Returns:
+            The members of the set.
+        """
+        return await redis.smembers(name=name)
+
+    @staticmethod
+    async def run_script(script: str, keys: List[str], args: List[Union[str, int, float]]) -> Any:
+        """
+        Run a Lua script in Redis atomically.
+
+        The script is sent once and called by its SHA1 digest afterwards.
+        The keys it touches are not cached, so they must not be read through the cache.
+
+        Args:
+            script: The source of the script.
+            keys: The names of the keys the script accesses.
+            args: The arguments of the script.
+
+        Returns:
+            The reply of the script.
+        """
+        if script not in _scripts:
+            _scripts[script] = redis.register_script(script)
+        return await _scripts[script](keys=keys, args=args)
@@ -0,0 +1,231 @@
+import json
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Dict, Optional, Tuple
+
+import msgpack
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import KeyBuilder, RedisStorage
+from redis.asyncio.client import Redis
+
+from utils.metrics import fsm_writes_total
+
+# Number of records whose last known value is remembered before the least recently used ones are forgotten
+MAX_RECORDS = 10000
+
+
+def pack_data(data: Dict[str, Any]) -> bytes:
+    """
+    Serialize FSM data with msgpack.
+
+    Args:
+        data: The data of a record.
+
+    Returns:
+        The packed data.
+    """
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def digest(payload: bytes) -> bytes:
+    """
+    Hash packed FSM data to tell whether a record changed.
+
+    Args:
+        payload: The packed data.
+
+    Returns:
+        The digest of the data.
+    """
+    return blake2b(payload, digest_size=16).digest()
+
+
+def unpack_data(value: bytes) -> Dict[str, Any]:
+    """
+    Deserialize FSM data, including the JSON written before msgpack was used.
+
+    A packed dictionary never starts with the opening brace of a JSON object.
+
+    Args:
+        value: The bytes read from Redis.
+
+    Returns:
+        The data of the record.
+    """
+    if value.startswith(b'{'):
+        return json.loads(value)
+    return msgpack.unpackb(value, raw=False, strict_map_key=False)
+
+
+class CompactRedisStorage(RedisStorage):
+    """
+    Redis FSM storage keeping records small and writing them only when they change.
+
+    aiogram-dialog saves the stack and context of a dialog after every update, mostly unchanged.
+    Data is packed with msgpack, and the digest of the last value read or written is kept
+    for every record, so a save of the same value is skipped. Reads refresh the TTL with GETEX,
+    so only the state of inactive users expires. The remembered values assume every user
+    is served by a single process, as the worker processes guarantee.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_builder: Optional[KeyBuilder] = None,
+        state_ttl: int = 0,
+        data_ttl: int = 0
+    ) -> None:
+        """
+        Args:
+            redis: The Redis client.
+            key_builder: The builder of the key names of the records.
+            state_ttl: The number of seconds the state of an inactive user is kept, 0 keeps it forever.
+            data_ttl: The number of seconds the data of an inactive user is kept, 0 keeps it forever.
+        """
+        super().__init__(redis, key_builder=key_builder, state_ttl=state_ttl or None, data_ttl=data_ttl or None)
+        self._known: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+
+    def _remember(self, name: str, value: Any) -> None:
+        """
+        Remember the value a record has in Redis, along with the time its TTL was refreshed.
+
+        Args:
+            name: The name of the Redis key.
+            value: The state, or the digest of the packed data.
+        """
+        self._known[name] = (value, time.monotonic())
+        self._known.move_to_end(name)
+        while len(self._known) > MAX_RECORDS:
+            self._known.popitem(last=False)
+
+    def _unchanged(self, name: str, value: Any, ttl: int | None) -> bool:
+        """
+        Check whether a record already has a value, with its TTL refreshed recently enough.
+
+        Args:
+            name: The name of the Redis key.
+            value: The state, or the digest of the packed data.
+            ttl: The TTL of the record in seconds, None if it is kept forever.
+
+        Returns:
+            True if writing the value can be skipped.
+        """
+        known = self._known.get(name)
+        if known is None or known[0] != value:
+            return False
+        return ttl is None or time.monotonic() - known[1] < ttl / 2
+
+    async def _read(self, name: str, ttl: int | None) -> Any:
+        """
+        Read a record, refreshing its TTL.
+
+        Args:
+            name: The name of the Redis key.
+            ttl: The TTL of the record in seconds, None if it is kept forever.
+
+        Returns:
+            The value read from Redis, or None if there is none.
+        """
+        if ttl is None:
+            return await self.redis.get(name)
+        return await self.redis.getex(name, ex=ttl)
+
+    async def _write(self, name: str, record: str, value: Any, payload: Any, ttl: int | None) -> None:
+        """
+        Write a record unless it already has the value, deleting it if the payload is empty.
+
+        Args:
+            name: The name of the Redis key.
+            record: The kind of the record for the metrics, state or data.
+            value: The state, or the digest of the packed data.
+            payload: The value written to Redis, None deletes the record.
+            ttl: The TTL of the record in seconds, None if it is kept forever.
+        """
+        if payload is None:
+            self._known.pop(name, None)
+            await self.redis.delete(name)
+            fsm_writes_total.inc(record, 'deleted')
+            return
+
+        if self._unchanged(name, value, ttl):
+            fsm_writes_total.inc(record, 'skipped')
+            return
+
+        await self.redis.set(name, payload, ex=ttl)
+        self._remember(name, value)
+        fsm_writes_total.inc(record, 'written')
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """
+        Set the state of a user unless it is already set.
+
+        Args:
+            key: The storage key of the user.
+            state: The new state, None clears it.
+        """
+        state = state.state if isinstance(state, State) else state
+        await self._write(self.key_builder.build(key, 'state'), 'state', state, state, self.state_ttl)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        """
+        Get the state of a user, refreshing its TTL.
+
+        Args:
+            key: The storage key of the user.
+
+        Returns:
+            The state, or None if there is none.
+        """
+        name = self.key_builder.build(key, 'state')
+        state = await self._read(name, self.state_ttl)
+        if isinstance(state, bytes):
+            state = state.decode()
+        if state is not None:
+            self._remember(name, state)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        """
+        Set the data of a record unless it is unchanged.
+
+        Args:
+            key: The storage key of the record.
+            data: The new data, an empty dictionary deletes the record.
+        """
+        payload = pack_data(data) if data else None
+        await self._write(self.key_builder.build(key, 'data'), 'data', payload and digest(payload), payload,
+                          self.data_ttl)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        """
+        Get the data of a record, refreshing its TTL.
+
+        The client decodes replies with the surrogateescape error handler, so the original
+        bytes of the packed data are recovered from the string. Records still holding JSON
+        get a digest no packed value has, so they are rewritten packed on the next save.
+
+        Args:
+            key: The storage key of the record.
+
+        Returns:
+            The data, or an empty dictionary if there is none.
+        """
+        name = self.key_builder.build(key, 'data')
+        value = await self._read(name, self.data_ttl)
+        if value is None:
+            return {}
+
+        if isinstance(value, str):
+            value = value.encode('utf-8', 'surrogateescape')
+        self._remember(name, digest(value))
+        return unpack_data(value)
+
+    async def close(self) -> None:
+        """
+        Close the connections of the Redis client on shutdown.
+
+        aiogram closes the client with aclose, which the pinned redis 5.0.0 names close.
+        """
+        await self.redis.close(close_connection_pool=True)
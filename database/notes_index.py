@@ -0,0 +1,260 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from database.database import Batch, DBInterface
+
+
+@dataclass
+class NoteMeta:
+    """
+    Dataclass representing the metadata of a note.
+
+    Attributes:
+        created_at (int): The Unix time the note was first saved, 0 if it is unknown.
+        updated_at (int): The Unix time the note was last saved, 0 if it is unknown.
+        size (int): The number of characters in the note body.
+    """
+    created_at: int
+    updated_at: int
+    size: int
+
+    def pack(self) -> str:
+        """
+        Serialize the metadata into a compact hash value.
+
+        Returns:
+            The metadata as colon-separated integers.
+        """
+        return f'{self.created_at}:{self.updated_at}:{self.size}'
+
+    @classmethod
+    def unpack(cls, value: str) -> 'NoteMeta':
+        """
+        Deserialize metadata read from the metadata hash.
+
+        Args:
+            value: The packed metadata.
+
+        Returns:
+            The metadata of the note.
+        """
+        return cls(*map(int, value.split(':')))
+
+
+class NotesIndex:
+    """
+    A static class maintaining ordered indexes and metadata of note titles per user.
+
+    The indexes are sorted sets stored next to the user's notes hash: one scored by
+    the time the title was first saved, one by the time it was last saved and one with
+    equal scores, which Redis orders by title. The notes list can be paged in any order
+    with a range query instead of loading every note body, and the metadata hash keeps
+    the dates and size of each note, so only the displayed page of it is read.
+    Every change bumps a version counter, so rendered pages can be reused until the next one.
+    """
+
+    # Sort orders of the notes list: the index read and whether it is read from the highest score
+    ORDERS: Dict[str, Tuple[str, bool]] = {
+        'oldest': ('titles', False),
+        'newest': ('titles', True),
+        'title': ('names', False),
+        'edited': ('updated', True),
+    }
+
+    @staticmethod
+    def key(user_id: str, index: str = 'titles') -> str:
+        """
+        Get the name of a title index for a user.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            index: The index: titles by creation time, updated by modification time or names by title.
+
+        Returns:
+            The name of the sorted set holding the user's note titles.
+        """
+        return f'{user_id}:{index}'
+
+    @staticmethod
+    def meta_key(user_id: str) -> str:
+        """
+        Get the name of the hash holding the metadata of every note.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+
+        Returns:
+            The name of the hash.
+        """
+        return f'{user_id}:meta'
+
+    @staticmethod
+    def version_key(user_id: str) -> str:
+        """
+        Get the name of the counter bumped on every change of the notes list.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+
+        Returns:
+            The name of the counter.
+        """
+        return f'{user_id}:version'
+
+    @staticmethod
+    async def version(user_id: str) -> int:
+        """
+        Get the version of the notes list, served from the read cache.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+
+        Returns:
+            The number of changes of the notes list.
+        """
+        return int(await DBInterface.get_data(NotesIndex.version_key(user_id), cached=True) or 0)
+
+    @staticmethod
+    async def ensure(user_id: str) -> int:
+        """
+        Build the title indexes and metadata from the notes hash if they do not exist yet.
+
+        Users who saved notes before an index was introduced only have the hash,
+        so their titles are indexed once in the hash order, reading it in batches.
+        The dates of such notes are unknown and stored as 0. Users without notes
+        are told apart by the cached length of the hash, so nothing is scanned for them.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+
+        Returns:
+            The number of titles in the index.
+        """
+        if not await DBInterface.hlen(user_id):
+            return 0
+
+        indexes = ('titles', 'updated', 'names')
+        counts = [await DBInterface.zcard(NotesIndex.key(user_id, index)) for index in indexes]
+        has_meta = bool(await DBInterface.hlen(NotesIndex.meta_key(user_id)))
+        if all(counts) and has_meta:
+            return counts[0]
+
+        count = 0
+        async for notes in DBInterface.hscan_batches(user_id):
+            async with DBInterface.batch() as batch:
+                for index, indexed in zip(indexes, counts):
+                    if not indexed:
+                        batch.zadd(NotesIndex.key(user_id, index), nx=True,
+                                   mapping={title: 0 if index == 'names' else score
+                                            for score, title in enumerate(notes, start=count)})
+                if not has_meta:
+                    batch.hset_data(NotesIndex.meta_key(user_id),
+                                    mapping={title: NoteMeta(0, 0, len(note)).pack() for title, note in notes.items()})
+                batch.incr(NotesIndex.version_key(user_id))
+            count += len(notes)
+        return count
+
+    @staticmethod
+    async def add(user_id: str, title: str, note: str, batch: Batch | None = None) -> NoteMeta | None:
+        """
+        Add a title to the indexes, keeping the creation time of an already indexed one.
+
+        ensure must be called before the note is written to the hash, so the notes
+        saved before the index existed are indexed ahead of it.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            title: The title of the saved note.
+            note: The body of the saved note.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+
+        Returns:
+            The metadata the note had before, or None if it is new.
+        """
+        return (await NotesIndex.add_many(user_id, {title: note}, batch))[0]
+
+    @staticmethod
+    async def add_many(user_id: str, notes: Dict[str, str], batch: Batch | None = None) -> List[NoteMeta | None]:
+        """
+        Add several titles to the indexes in their order.
+
+        ensure must be called before the notes are written to the hash.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            notes: A dictionary of the titles and bodies of the saved notes.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+
+        Returns:
+            A list of the metadata the notes had before in their order, with None for new notes.
+        """
+        titles = list(notes)
+        now = time.time()
+        scores = {title: now + index / 1e6 for index, title in enumerate(titles)}
+        previous = await NotesIndex.meta(user_id, titles)
+
+        meta = {}
+        for title, old in zip(titles, previous):
+            created_at = old.created_at if old else int(now)
+            meta[title] = NoteMeta(created_at, int(now), len(notes[title])).pack()
+
+        async with DBInterface.batch(batch) as batch:
+            batch.zadd(NotesIndex.key(user_id), mapping=scores, nx=True)
+            batch.zadd(NotesIndex.key(user_id, 'updated'), mapping=scores)
+            batch.zadd(NotesIndex.key(user_id, 'names'), mapping=dict.fromkeys(titles, 0))
+            batch.hset_data(NotesIndex.meta_key(user_id), mapping=meta)
+            batch.incr(NotesIndex.version_key(user_id))
+        return previous
+
+    @staticmethod
+    async def remove(user_id: str, title: str, batch: Batch | None = None) -> None:
+        """
+        Remove a title from the indexes and its metadata.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            title: The title of the deleted note.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        async with DBInterface.batch(batch) as batch:
+            for index in ('titles', 'updated', 'names'):
+                batch.zrem(NotesIndex.key(user_id, index), [title])
+            batch.hdel(NotesIndex.meta_key(user_id), [title])
+            batch.incr(NotesIndex.version_key(user_id))
+
+    @staticmethod
+    async def page(user_id: str, page_number: int, page_size: int, order: str = 'oldest') -> List[str]:
+        """
+        Get the titles displayed on a single page of the notes list.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            page_number: The zero-based number of the page.
+            page_size: The maximum number of titles on a page.
+            order: The sort order, one of the ORDERS keys.
+
+        Returns:
+            A list of titles for the requested page.
+        """
+        index, reverse = NotesIndex.ORDERS[order]
+        start = page_number * page_size
+        read = DBInterface.zrevrange if reverse else DBInterface.zrange
+        return await read(NotesIndex.key(user_id, index), start, start + page_size - 1)
+
+    @staticmethod
+    async def meta(user_id: str, titles: List[str]) -> List[NoteMeta | None]:
+        """
+        Get the metadata of several notes with a single command.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            titles: The titles of the notes.
+
+        Returns:
+            A list of metadata in the order of the titles, with None for notes without it.
+        """
+        if not titles:
+            return []
+        values = await DBInterface.hmget(NotesIndex.meta_key(user_id), titles)
+        return [NoteMeta.unpack(value) if value else None for value in values]
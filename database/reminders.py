@@ -0,0 +1,211 @@
+from dataclasses import dataclass
+from typing import List
+
+from config.config import Config, get_config
+from database.database import Batch, DBInterface
+
+# Load configuration
+config: Config = get_config()
+
+# Takes the due reminders of a queue and moves them to the end of their lease, so they are
+# delivered again if they are not acknowledged in time. Returns the members and their locales.
+CLAIM = '''
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local claimed = {}
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], ARGV[3], member)
+    table.insert(claimed, member)
+    table.insert(claimed, redis.call('HGET', KEYS[2], member) or '')
+end
+return claimed
+'''
+
+# Removes a delivered reminder unless it was scheduled again while it was being delivered.
+# Returns 1 if the reminder was removed and 0 otherwise.
+ACK = '''
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score and tonumber(score) == tonumber(ARGV[2]) then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    return 1
+end
+return 0
+'''
+
+
+@dataclass
+class Reminder:
+    """
+    Dataclass representing a reminder taken from a due queue.
+
+    Attributes:
+        user_id (str): The ID of the user owning the note.
+        title (str): The title of the note.
+        locale (str): The locale the reminder is sent in.
+        shard (int): The number of the queue holding the reminder.
+        lease (float): The Unix time the reminder is delivered again at unless it is acknowledged.
+    """
+    user_id: str
+    title: str
+    locale: str
+    shard: int
+    lease: float
+
+    @property
+    def member(self) -> str:
+        """
+        The member of the reminder in its queue.
+
+        Returns:
+            The user ID and note title.
+        """
+        return Reminders.member(self.user_id, self.title)
+
+
+class Reminders:
+    """
+    A static class maintaining note reminders in sharded due queues.
+
+    Every queue is a sorted set of reminders scored by the Unix time they are due, with
+    a hash of the locales they are sent in. A user's reminders always go to the same queue,
+    and a note has at most one reminder. Reminders are taken from a queue in batches
+    and acknowledged once sent, a taken reminder that is not acknowledged before its lease
+    ends is due again, so every reminder is delivered at least once.
+    """
+
+    @staticmethod
+    def shard(user_id: str) -> int:
+        """
+        Get the queue of a user's reminders.
+
+        Args:
+            user_id: The ID of the user.
+
+        Returns:
+            The number of the queue.
+        """
+        return int(user_id) % config.reminders.shards
+
+    @staticmethod
+    def key(shard: int) -> str:
+        """
+        Get the name of a due queue.
+
+        Args:
+            shard: The number of the queue.
+
+        Returns:
+            The name of the sorted set.
+        """
+        return f'notebot:reminders:{shard}'
+
+    @staticmethod
+    def locales_key(shard: int) -> str:
+        """
+        Get the name of the hash holding the locales of the reminders of a queue.
+
+        Args:
+            shard: The number of the queue.
+
+        Returns:
+            The name of the hash.
+        """
+        return f'notebot:reminders:{shard}:locales'
+
+    @staticmethod
+    def member(user_id: str, title: str) -> str:
+        """
+        Get the member of a reminder in its queue.
+
+        Args:
+            user_id: The ID of the user owning the note.
+            title: The title of the note.
+
+        Returns:
+            The user ID and note title separated by a colon.
+        """
+        return f'{user_id}:{title}'
+
+    @staticmethod
+    async def schedule(user_id: str, title: str, due: float, locale: str, batch: Batch | None = None) -> None:
+        """
+        Set the reminder of a note, replacing the one it had.
+
+        Args:
+            user_id: The ID of the user owning the note.
+            title: The title of the note.
+            due: The Unix time the reminder is sent at.
+            locale: The locale the reminder is sent in.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        shard, member = Reminders.shard(user_id), Reminders.member(user_id, title)
+        async with DBInterface.batch(batch) as batch:
+            batch.zadd(Reminders.key(shard), mapping={member: due})
+            batch.hset_data(Reminders.locales_key(shard), mapping={member: locale})
+
+    @staticmethod
+    async def cancel(user_id: str, title: str, batch: Batch | None = None) -> None:
+        """
+        Remove the reminder of a note, if it has one.
+
+        Args:
+            user_id: The ID of the user owning the note.
+            title: The title of the note.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        shard, member = Reminders.shard(user_id), Reminders.member(user_id, title)
+        async with DBInterface.batch(batch) as batch:
+            batch.zrem(Reminders.key(shard), [member])
+            batch.hdel(Reminders.locales_key(shard), [member])
+
+    @staticmethod
+    async def due(user_id: str, title: str) -> float | None:
+        """
+        Get the time the reminder of a note is due.
+
+        Args:
+            user_id: The ID of the user owning the note.
+            title: The title of the note.
+
+        Returns:
+            The Unix time of the reminder, or None if the note has none.
+        """
+        return await DBInterface.zscore(Reminders.key(Reminders.shard(user_id)), Reminders.member(user_id, title))
+
+    @staticmethod
+    async def claim(shard: int, now: float, limit: int, lease: int) -> List[Reminder]:
+        """
+        Take the due reminders of a queue for delivery.
+
+        Args:
+            shard: The number of the queue.
+            now: The current Unix time.
+            limit: The maximum number of reminders taken.
+            lease: The number of seconds before the reminders are due again unless acknowledged.
+
+        Returns:
+            A list of the taken reminders, oldest first.
+        """
+        until = round(now + lease, 3)
+        reply = await DBInterface.run_script(CLAIM, [Reminders.key(shard), Reminders.locales_key(shard)],
+                                             [now, limit, until])
+        reminders = []
+        for member, locale in zip(reply[::2], reply[1::2]):
+            user_id, _, title = member.partition(':')
+            reminders.append(Reminder(user_id, title, locale, shard, until))
+        return reminders
+
+    @staticmethod
+    async def ack(reminder: Reminder) -> bool:
+        """
+        Remove a delivered reminder from its queue.
+
+        Args:
+            reminder: The reminder taken from the queue.
+
+        Returns:
+            True if it was removed, False if it was scheduled again in the meantime.
+        """
+        return bool(await DBInterface.run_script(ACK, [Reminders.key(reminder.shard),
+                                                       Reminders.locales_key(reminder.shard)],
+                                                 [reminder.member, reminder.lease]))
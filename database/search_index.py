@@ -0,0 +1,245 @@
+import re
+from collections import Counter
+from typing import Dict, List
+
+from database.database import Batch, DBInterface
+
+# How much more a word in the title weighs than a word in the body
+TITLE_WEIGHT = 3
+
+# Seconds the results of a search are kept for paging
+RESULTS_TTL = 300
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class SearchIndex:
+    """
+    A static class maintaining a per-user inverted index over note titles and bodies.
+
+    Every word has a sorted set of the titles of the notes containing it, scored by
+    how often the word occurs, and every note keeps the list of its words so it can be
+    removed from the index. A search intersects the sorted sets of the query words,
+    so its cost depends on the number of matches rather than the number of notes.
+    """
+
+    @staticmethod
+    def term_key(user_id: str, word: str) -> str:
+        """
+        Get the name of the sorted set of notes containing a word.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            word: The indexed word.
+
+        Returns:
+            The name of the sorted set.
+        """
+        return f'{user_id}:term:{word}'
+
+    @staticmethod
+    def words_key(user_id: str) -> str:
+        """
+        Get the name of the hash holding the indexed words of every note.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+
+        Returns:
+            The name of the hash.
+        """
+        return f'{user_id}:words'
+
+    @staticmethod
+    def results_key(user_id: str) -> str:
+        """
+        Get the name of the sorted set holding the results of the last search.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+
+        Returns:
+            The name of the sorted set.
+        """
+        return f'{user_id}:results'
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """
+        Split a text into lowercase words.
+
+        Args:
+            text: The text to be split.
+
+        Returns:
+            A list of words in the order they occur.
+        """
+        return WORD_PATTERN.findall(text.lower())
+
+    @staticmethod
+    def weigh(title: str, note: str) -> Dict[str, int]:
+        """
+        Score the words of a note.
+
+        Args:
+            title: The title of the note.
+            note: The body of the note.
+
+        Returns:
+            A dictionary of words and their scores.
+        """
+        weights = Counter(SearchIndex.tokenize(note))
+        for word in SearchIndex.tokenize(title):
+            weights[word] += TITLE_WEIGHT
+        return dict(weights)
+
+    @staticmethod
+    async def ensure(user_id: str) -> None:
+        """
+        Index all notes of a user once, if they were saved before the index existed.
+
+        The words of every batch of notes read from the hash are written in a single pipeline.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+        """
+        marker = f'{user_id}:indexed'
+        if await DBInterface.get_data(marker):
+            return
+
+        async for notes in DBInterface.hscan_batches(user_id):
+            await SearchIndex.add_many(user_id, notes)
+        await DBInterface.set_data(marker, 1)
+
+    @staticmethod
+    async def add(user_id: str, title: str, note: str, batch: Batch | None = None) -> None:
+        """
+        Index a saved note, replacing the words of a previous note with the same title.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            title: The title of the note.
+            note: The body of the note.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        await SearchIndex.add_many(user_id, {title: note}, batch)
+
+    @staticmethod
+    async def add_many(user_id: str, notes: Dict[str, str], batch: Batch | None = None) -> None:
+        """
+        Index several saved notes, replacing the words of previous notes with the same titles.
+
+        The words of the previous notes are read with a single HMGET.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            notes: A dictionary of the titles and bodies of the saved notes.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        titles = list(notes)
+        previous = await DBInterface.hmget(SearchIndex.words_key(user_id), titles)
+
+        async with DBInterface.batch(batch) as batch:
+            words = {}
+            for title, old_words in zip(titles, previous):
+                SearchIndex._queue_removal(user_id, title, old_words, batch)
+
+                weights = SearchIndex.weigh(title, notes[title])
+                for word, weight in weights.items():
+                    batch.zadd(SearchIndex.term_key(user_id, word), mapping={title: weight})
+                words[title] = ' '.join(weights)
+            batch.hset_data(SearchIndex.words_key(user_id), mapping=words)
+
+    @staticmethod
+    async def remove(user_id: str, title: str, batch: Batch | None = None) -> None:
+        """
+        Remove a deleted note from the index and from the results of the last search.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            title: The title of the note.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        async with DBInterface.batch(batch) as batch:
+            await SearchIndex._remove_words(user_id, title, batch)
+            batch.hdel(SearchIndex.words_key(user_id), [title])
+            batch.zrem(SearchIndex.results_key(user_id), [title])
+
+    @staticmethod
+    async def _remove_words(user_id: str, title: str, batch: Batch) -> None:
+        """
+        Queue the removal of a note from the sorted sets of its indexed words.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            title: The title of the note.
+            batch: The batch to queue the writes in.
+        """
+        words = await DBInterface.hget(SearchIndex.words_key(user_id), title)
+        SearchIndex._queue_removal(user_id, title, words, batch)
+
+    @staticmethod
+    def _queue_removal(user_id: str, title: str, words: str | None, batch: Batch) -> None:
+        """
+        Queue the removal of a note from the sorted sets of the given words.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            title: The title of the note.
+            words: The space-separated words the note was indexed under, None if it was not indexed.
+            batch: The batch to queue the writes in.
+        """
+        for word in (words or '').split():
+            batch.zrem(SearchIndex.term_key(user_id, word), [title])
+
+    @staticmethod
+    async def search(user_id: str, query: str) -> int:
+        """
+        Find the notes containing every word of a query and keep them for paging.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            query: The search query.
+
+        Returns:
+            The number of notes found.
+        """
+        await SearchIndex.ensure(user_id)
+
+        words = set(SearchIndex.tokenize(query))
+        if not words:
+            return 0
+
+        count = await DBInterface.zinterstore(SearchIndex.results_key(user_id),
+                                              [SearchIndex.term_key(user_id, word) for word in words])
+        await DBInterface.expire(SearchIndex.results_key(user_id), RESULTS_TTL)
+        return count
+
+    @staticmethod
+    async def page(user_id: str, page_number: int, page_size: int) -> List[str]:
+        """
+        Get the titles displayed on a single page of the search results, best matches first.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            page_number: The zero-based number of the page.
+            page_size: The maximum number of titles on a page.
+
+        Returns:
+            A list of titles for the requested page.
+        """
+        start = page_number * page_size
+        return await DBInterface.zrevrange(SearchIndex.results_key(user_id), start, start + page_size - 1)
+
+    @staticmethod
+    async def count(user_id: str) -> int:
+        """
+        Get the number of notes found by the last search.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+
+        Returns:
+            The number of notes in the kept results.
+        """
+        return await DBInterface.zcard(SearchIndex.results_key(user_id))
@@ -0,0 +1,177 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from database.database import Batch, DBInterface
+from database.notes_index import NoteMeta
+
+# Reads every counter in one round trip, bypassing the read cache of the process, since
+# the counters are changed by every process. Returns the note count and size, the number
+# of known users and of the ones active since the two given times, and the top users
+# by size with their sizes and note counts.
+SUMMARY = '''
+local totals = redis.call('HMGET', KEYS[1], 'notes', 'size')
+local top = redis.call('ZREVRANGE', KEYS[3], 0, tonumber(ARGV[3]) - 1, 'WITHSCORES')
+local users = {}
+for i = 1, #top, 2 do
+    table.insert(users, top[i])
+    table.insert(users, top[i + 1])
+    table.insert(users, redis.call('ZSCORE', KEYS[2], top[i]) or '0')
+end
+return {totals[1] or '0', totals[2] or '0', redis.call('ZCARD', KEYS[4]),
+        redis.call('ZCOUNT', KEYS[4], ARGV[1], '+inf'), redis.call('ZCOUNT', KEYS[4], ARGV[2], '+inf'), users}
+'''
+
+
+@dataclass
+class UserStats:
+    """
+    Dataclass representing the usage of a single user.
+
+    Attributes:
+        user_id (str): The ID of the user.
+        notes (int): The number of notes of the user.
+        size (int): The number of characters in the notes of the user.
+    """
+    user_id: str
+    notes: int
+    size: int
+
+
+@dataclass
+class Summary:
+    """
+    Dataclass representing the usage of the bot.
+
+    Attributes:
+        notes (int): The number of notes of all users.
+        size (int): The number of characters in the notes of all users.
+        users (int): The number of users who started the bot or have notes.
+        active_day (int): The number of users who started the bot in the last day.
+        active_week (int): The number of users who started the bot in the last week.
+        top (List[UserStats]): The users with the most characters in their notes, largest first.
+    """
+    notes: int
+    size: int
+    users: int
+    active_day: int
+    active_week: int
+    top: List[UserStats] = field(default_factory=list)
+
+
+class Stats:
+    """
+    A static class maintaining usage counters, so statistics never need a scan of the keyspace.
+
+    The totals are kept in a hash, the note counts and sizes of every user in sorted sets,
+    so the heaviest users are a range query, and the time every user last started the bot
+    in another sorted set. The counters are queued in the batch of the change they count.
+    Sizes are counted in characters, like the note metadata they are derived from.
+    """
+
+    TOTALS_KEY = 'notebot:stats'
+    NOTES_KEY = 'notebot:stats:notes'
+    SIZES_KEY = 'notebot:stats:sizes'
+    ACTIVE_KEY = 'notebot:stats:active'
+
+    @staticmethod
+    async def seen(user_id: str, batch: Batch | None = None) -> None:
+        """
+        Record the activity of a user.
+
+        Args:
+            user_id: The ID of the user.
+            batch: The batch to queue the write in, it is sent in a pipeline of its own without one.
+        """
+        async with DBInterface.batch(batch) as batch:
+            batch.zadd(Stats.ACTIVE_KEY, mapping={user_id: time.time()})
+
+    @staticmethod
+    async def saved(user_id: str, notes: Dict[str, str], previous: List[NoteMeta | None],
+                    batch: Batch | None = None) -> None:
+        """
+        Count saved notes, replacing the sizes of the ones that already existed.
+
+        Args:
+            user_id: The ID of the user owning the notes.
+            notes: A dictionary of the titles and bodies of the saved notes.
+            previous: The metadata the notes had before in their order, with None for new notes.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        added = sum(meta is None for meta in previous)
+        size = sum(map(len, notes.values())) - sum(meta.size for meta in previous if meta)
+        await Stats._change(user_id, added, size, batch)
+
+    @staticmethod
+    async def removed(user_id: str, meta: NoteMeta | None, batch: Batch | None = None) -> None:
+        """
+        Count a removed note.
+
+        Args:
+            user_id: The ID of the user owning the note.
+            meta: The metadata of the note, None if it no longer exists and nothing is counted.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        if meta is not None:
+            await Stats._change(user_id, -1, -meta.size, batch)
+
+    @staticmethod
+    async def _change(user_id: str, notes: int, size: int, batch: Batch | None) -> None:
+        """
+        Add to the note count and size of a user and of all users.
+
+        Args:
+            user_id: The ID of the user.
+            notes: The change of the note count.
+            size: The change of the size in characters.
+            batch: The batch to queue the writes in, they are sent in a pipeline of their own without one.
+        """
+        if not notes and not size:
+            return
+        async with DBInterface.batch(batch) as batch:
+            batch.zincrby(Stats.NOTES_KEY, user_id, notes)
+            batch.zincrby(Stats.SIZES_KEY, user_id, size)
+            batch.hincrby(Stats.TOTALS_KEY, 'notes', notes)
+            batch.hincrby(Stats.TOTALS_KEY, 'size', size)
+
+    @staticmethod
+    async def summary(top: int) -> Summary:
+        """
+        Read the counters.
+
+        Args:
+            top: The number of the heaviest users listed.
+
+        Returns:
+            The usage of the bot.
+        """
+        now = time.time()
+        reply = await DBInterface.run_script(
+            SUMMARY, [Stats.TOTALS_KEY, Stats.NOTES_KEY, Stats.SIZES_KEY, Stats.ACTIVE_KEY],
+            [now - 86400, now - 7 * 86400, top])
+        notes, size, users, day, week, rows = reply
+        users_stats = [UserStats(rows[i], int(float(rows[i + 2])), int(float(rows[i + 1])))
+                       for i in range(0, len(rows), 3)]
+        return Summary(int(notes), int(size), int(users), int(day), int(week), users_stats)
+
+    @staticmethod
+    async def replace(totals: Dict[str, Tuple[int, int]]) -> None:
+        """
+        Replace the note counters with recomputed ones in a single transaction.
+
+        Users missing from the activity set are added as last seen at time 0, so they are
+        counted as known users without being counted as active.
+
+        Args:
+            totals: A dictionary of user IDs and their note count and size.
+        """
+        users = list(totals)
+        async with DBInterface.batch(transaction=True) as batch:
+            batch.delete([Stats.NOTES_KEY, Stats.SIZES_KEY])
+            for start in range(0, len(users), 1000):
+                chunk = users[start:start + 1000]
+                batch.zadd(Stats.NOTES_KEY, mapping={user: totals[user][0] for user in chunk})
+                batch.zadd(Stats.SIZES_KEY, mapping={user: totals[user][1] for user in chunk})
+                batch.zadd(Stats.ACTIVE_KEY, mapping=dict.fromkeys(chunk, 0), nx=True)
+            batch.hset_data(Stats.TOTALS_KEY, mapping={'notes': sum(notes for notes, _ in totals.values()),
+                                                        'size': sum(size for _, size in totals.values())})
@@ -1,9 +1,14 @@
 from aiogram_dialog import Dialog
 
-from dialogs.windows import notes_menu, add_note_window, notes_list_window
+from dialogs.windows import (notes_menu, add_note_window, notes_list_window, search_window, import_window,
+                             reminder_window, stats_window)
 
 notes_dialog = Dialog(
     notes_menu,
     add_note_window,
     notes_list_window,
+    search_window,
+    import_window,
+    reminder_window,
+    stats_window,
 )
@@ -1,3 +1,7 @@
 from dialogs.windows.notes.add_note import add_note_window
+from dialogs.windows.notes.import_notes import import_window
 from dialogs.windows.notes.notes_list import notes_list_window
 from dialogs.windows.notes.notes_menu import notes_menu
+from dialogs.windows.notes.reminder import reminder_window
+from dialogs.windows.notes.search import search_window
+from dialogs.windows.notes.stats import stats_window
@@ -1,96 +1,218 @@
-from typing import Dict, TYPE_CHECKING, Union, List, Any
+from datetime import datetime, timezone
+from math import ceil
+from typing import Dict, TYPE_CHECKING, Union, List
 
-from aiogram.types import Chat
+from aiogram.types import Chat, User
 from aiogram_dialog import DialogManager
-from environs import Env
 from fluentogram import TranslatorRunner
 
-from database import DBInterface
+from config.config import Config, get_config
+from database import DBInterface, NoteMeta, NotesIndex, Reminders, SearchIndex, Stats
+from database.cache import MISSING, ReadCache
+from utils.i18n import runner_locale
+from utils.metrics import Gauges, registry, timed_handler
 
 if TYPE_CHECKING:
     from locales.stub import TranslatorRunner
 
-# Load environment variables
-env = Env()
-env.read_env()
+# Load configuration
+config: Config = get_config()
 
 # Load configuration parameters
-PAGE_SIZE = int(env('PAGE_SIZE'))
-HEIGHT = int(env('HEIGHT'))
+PAGE_SIZE = config.tg_bot.pag_page_size
+HEIGHT = config.tg_bot.pag_height
+NOTE_PAGE_LENGTH = config.tg_bot.note_page_length
+ADMINS = config.tg_bot.admins
+
+# Number of the heaviest users listed in the statistics
+STATS_TOP = 10
 
 # Adjust PAGE_SIZE if HEIGHT is greater than 1
 if HEIGHT > 1:
     PAGE_SIZE *= HEIGHT
 
+# Rendered pages of the notes list by user, keyed by the version of the user's notes
+render_cache = ReadCache(max_entries=config.cache.max_entries, ttl=config.cache.ttl,
+                         max_bytes=config.cache.max_bytes)
+
+registry.register(Gauges('notebot_render_cache', 'Rendered page cache counter.', kind='counter',
+                         read=lambda: {key: render_cache.stats()[key] for key in ('hits', 'misses', 'evictions')}))
+
 
-async def _message_creator(notes_data: Dict[str, Any], manager: DialogManager) -> str:
+async def _message_creator(notes_items: List[tuple[int, str]]) -> str:
     """
-    Create a message string from notes data for pagination.
+    Create a message string from the notes of the current page.
 
     Args:
-        notes_data: Dictionary containing notes data.
-        manager: Dialog manager instance.
+        notes_items: List of tuples containing the index and note title.
 
     Returns:
         A formatted string representing the notes.
     """
-    message = ""
-    notes = list(notes_data.keys())
-    page_number = manager.start_data['page_number']
-    start_index = page_number * PAGE_SIZE
-    end_index = start_index + PAGE_SIZE
+    return '\n'.join(f"{index}. {title}" for index, title in notes_items)
+
+
+def _note_info(meta: NoteMeta | None, i18n: TranslatorRunner) -> str:
+    """
+    Describe the date and size of a note for the notes list, dated in UTC like the reminders.
+
+    Args:
+        meta: The metadata of the note, if it is known.
+        i18n: Translator runner instance.
+
+    Returns:
+        The localized description, empty without metadata.
+    """
+    if meta is None:
+        return ''
+    if not meta.updated_at:
+        return i18n.note.size(size=meta.size)
+    date = datetime.fromtimestamp(meta.updated_at, timezone.utc).strftime('%Y-%m-%d')
+    return i18n.note.info(date=date, size=meta.size)
+
 
-    if start_index == len(notes):
-        manager.start_data['page_number'] -= 1
-        start_index -= PAGE_SIZE
-        end_index -= PAGE_SIZE
+def _format_due(due: float) -> str:
+    """
+    Format the time a reminder is due, in UTC since the time zone of the user is unknown.
 
-    for index, item in enumerate(notes[start_index:end_index], start=start_index + 1):
-        message += f"{index}. {item}\n"
+    Args:
+        due: The Unix time of the reminder.
 
-    return message.rstrip('\n')
+    Returns:
+        The date and time of the reminder.
+    """
+    return datetime.fromtimestamp(due, timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
 
 
-async def _get_notes_items(notes_data: Dict[str, Any]) -> List[tuple[int, str]]:
+def _split_note(note: str, length: int) -> List[str]:
     """
-    Get a list of note items for display.
+    Split the body of a note into pages that fit in a message.
+
+    Pages end at a line break or, failing that, at a space in their second half,
+    so words are only cut when there is no such place.
 
     Args:
-        notes_data: Dictionary containing notes data.
+        note: The body of the note.
+        length: The maximum number of characters on a page.
 
     Returns:
-        A list of tuples containing the index and note key.
+        A list of the pages of the note.
+    """
+    pages = []
+    while len(note) > length:
+        cut = note.rfind('\n', length // 2, length + 1)
+        if cut == -1:
+            cut = note.rfind(' ', length // 2, length + 1)
+        if cut == -1:
+            pages.append(note[:length])
+            note = note[length:]
+        else:
+            pages.append(note[:cut])
+            note = note[cut + 1:]
+    pages.append(note)
+    return pages
+
+
+async def _render_page(user_id: str, page_number: int, order: str,
+                       i18n: TranslatorRunner) -> tuple[str, List[tuple[int, str]]]:
     """
-    notes_list = []
-    keys = list(notes_data.keys())
+    Render a page of the notes list.
 
-    for i, key in enumerate(keys):
-        notes_list.append((i + 1, key))
+    Args:
+        user_id: The ID of the user owning the notes.
+        page_number: The zero-based number of the page.
+        order: The sort order of the list.
+        i18n: Translator runner instance.
 
-    return notes_list
+    Returns:
+        The text of the page and the numbered titles of its buttons.
+    """
+    titles = await NotesIndex.page(user_id, page_number, PAGE_SIZE, order)
+    infos = [_note_info(meta, i18n) for meta in await NotesIndex.meta(user_id, titles)]
+    notes_items = list(enumerate(titles, start=page_number * PAGE_SIZE + 1))
+    lines = [(index, f'{title} ({info})' if info else title) for (index, title), info in zip(notes_items, infos)]
+    return await _message_creator(lines), notes_items
 
 
-async def menu_texts_getter(i18n: TranslatorRunner, **kwargs) -> Dict[str, str]:
+@timed_handler
+async def menu_texts_getter(event_from_user: User, i18n: TranslatorRunner, **kwargs) -> Dict[str, Union[str, bool]]:
     """
     Get localized menu texts.
 
     Args:
+        event_from_user: The user the menu is shown to.
         i18n: Translator runner instance.
 
     Returns:
-        A dictionary containing localized menu texts.
+        A dictionary containing localized menu texts and whether the user is an administrator.
     """
     return {
+        'is_admin': event_from_user.id in ADMINS,
+        'stats_text': i18n.stats.title(),
         'menu_text': i18n.command.select(),
         'list_text': i18n.notes.list(),
-        'add_text': i18n.add.note()
+        'add_text': i18n.add.note(),
+        'search_text': i18n.search.notes(),
+        'upload_text': i18n.upload.notes(),
+        'download_text': i18n.download.notes()
     }
 
 
+@timed_handler
 async def notes_list_getter(event_chat: Chat, dialog_manager: DialogManager, i18n: TranslatorRunner,
                             **kwargs) -> Dict[str, Union[List[tuple[int, str]], str]]:
     """
-    Get the list of notes for a user.
+    Get the current page of the notes list for a user in the selected sort order.
+
+    Only the titles and metadata of the displayed page are fetched from the indexes,
+    the total count is used by the pager. Rendered pages are kept until the notes change,
+    so flipping back and forth through the list is served from memory.
+
+    Args:
+        event_chat: The chat instance.
+        dialog_manager: Dialog manager instance.
+        i18n: Translator runner instance.
+
+    Returns:
+        A dictionary containing the notes message, items, sort orders and page count.
+    """
+    user_id = str(event_chat.id)
+    total = await NotesIndex.ensure(user_id)
+
+    sort = dialog_manager.find('sort')
+    if not sort.get_checked():
+        await sort.set_checked('oldest')
+
+    if not total:
+        return {'notes': i18n.no.notes(), 'pages': 0, 'paged': False, 'back_btn': i18n.back()}
+
+    pages = ceil(total / PAGE_SIZE)
+    page_number = dialog_manager.start_data['page_number']
+
+    # Step back if the last page became empty after a note was removed
+    if page_number >= pages:
+        page_number = pages - 1
+        await dialog_manager.find('notes_pages').set_page(page_number)
+
+    key = (await NotesIndex.version(user_id), sort.get_checked(), page_number, runner_locale(i18n))
+    page = render_cache.get(user_id, key)
+    if page is MISSING:
+        page = await _render_page(user_id, page_number, sort.get_checked(), i18n)
+        render_cache.set(user_id, key, page, render_cache.writes)
+    text, notes_items = page
+
+    sort_items = [(i18n.sort.oldest(), 'oldest'), (i18n.sort.newest(), 'newest'),
+                  (i18n.sort.title(), 'title'), (i18n.sort.edited(), 'edited')]
+
+    return {'notes': text, 'notes_items': notes_items, 'sort_items': sort_items,
+            'sortable': total > 1, 'pages': pages, 'paged': pages > 1, 'back_btn': i18n.back()}
+
+
+@timed_handler
+async def search_getter(event_chat: Chat, dialog_manager: DialogManager, i18n: TranslatorRunner,
+                        **kwargs) -> Dict[str, Union[List[tuple[int, str]], str, int, bool]]:
+    """
+    Get the current page of the search results for a user.
 
     Args:
         event_chat: The chat instance.
@@ -98,37 +220,127 @@ async def notes_list_getter(event_chat: Chat, dialog_manager: DialogManager, i18
         i18n: Translator runner instance.
 
     Returns:
-        A dictionary containing the notes message and items.
+        A dictionary containing the results message, items and page count.
     """
+    query = dialog_manager.dialog_data.get('query')
+
+    if not query:
+        return {'notes': i18n.enter.query(), 'pages': 0, 'paged': False, 'back_btn': i18n.back()}
+
     user_id = str(event_chat.id)
-    data = await DBInterface.hget_all(user_id)
-    msg = await _message_creator(data, dialog_manager)
-    notes_items = await _get_notes_items(data)
+    scroll = dialog_manager.find('search_pages')
+    page_number = await scroll.get_page()
+    total = await SearchIndex.count(user_id)
+    titles = await SearchIndex.page(user_id, page_number, PAGE_SIZE)
+
+    # Search again if the kept results expired
+    if not titles:
+        total = await SearchIndex.search(user_id, query)
+
+    if not total:
+        return {'notes': i18n.no.results(), 'pages': 0, 'paged': False, 'back_btn': i18n.back()}
+
+    pages = ceil(total / PAGE_SIZE)
+
+    if page_number >= pages or not titles:
+        page_number = min(page_number, pages - 1)
+        await scroll.set_page(page_number)
+        titles = await SearchIndex.page(user_id, page_number, PAGE_SIZE)
+
+    notes_items = list(enumerate(titles, start=page_number * PAGE_SIZE + 1))
+    message = f"{i18n.search.results(count=total)}\n\n{await _message_creator(notes_items)}"
+
+    return {'notes': message, 'notes_items': notes_items, 'pages': pages, 'paged': pages > 1,
+            'back_btn': i18n.back()}
+
+
+@timed_handler
+async def note_getter(event_chat: Chat, dialog_manager: DialogManager, i18n: TranslatorRunner,
+                      **kwargs) -> Dict[str, Union[str, bool, int]]:
+    """
+    Get the displayed page of the selected note and its reminder.
+
+    The dialog data only holds the title of the note, its body is read through
+    the read cache and long notes are split into pages flipped with a pager.
+
+    Args:
+        event_chat: The chat instance.
+        dialog_manager: Dialog manager instance.
+        i18n: Translator runner instance.
+
+    Returns:
+        A dictionary containing the note page and related actions.
+    """
+    note_name = dialog_manager.dialog_data.get('note_name')
+    note = await DBInterface.hget(str(event_chat.id), note_name) if note_name else None
+
+    if not note:
+        # The note was deleted since it was selected
+        dialog_manager.dialog_data.pop('note_name', None)
+        return {'note': None, 'note_pages': 0, 'delete_btn': i18n.delete(), 'back_btn': i18n.back()}
+
+    pages = _split_note(note, NOTE_PAGE_LENGTH)
+    scroll = dialog_manager.find('note_pages')
+    page_number = min(await scroll.get_page(), len(pages) - 1)
+    due = await Reminders.due(str(event_chat.id), note_name)
 
-    if msg:
-        return {'notes': msg, 'notes_items': notes_items, 'back_btn': i18n.back()}
-    return {'notes': i18n.no.notes(), 'back_btn': i18n.back()}
+    return {'note': pages[page_number], 'note_pages': len(pages), 'note_paged': len(pages) > 1,
+            'reminder': due and i18n.reminder.set(date=_format_due(due)), 'remind_btn': i18n.remind(),
+            'notes': False, 'notes_items': False, 'paged': False, 'sortable': False,
+            'delete_btn': i18n.delete(), 'back_btn': i18n.back()}
 
 
-async def note_getter(dialog_manager: DialogManager, i18n: TranslatorRunner, **kwargs) -> Dict[str, Union[str, bool]]:
+@timed_handler
+async def reminder_getter(event_chat: Chat, dialog_manager: DialogManager, i18n: TranslatorRunner,
+                          **kwargs) -> Dict[str, Union[str, List[tuple[str, int]], None]]:
     """
-    Get a specific note from the dialog manager.
+    Get the reminder of the selected note and the preset delays.
 
     Args:
+        event_chat: The chat instance.
         dialog_manager: Dialog manager instance.
         i18n: Translator runner instance.
 
     Returns:
-        A dictionary containing the note and related actions.
+        A dictionary containing the prompt, the current reminder and the delays in seconds.
+    """
+    note_name = dialog_manager.dialog_data.get('note_name')
+    due = await Reminders.due(str(event_chat.id), note_name)
+    delays = [(i18n.reminder.hour(), 3600), (i18n.reminder.hours(), 3 * 3600),
+              (i18n.reminder.day(), 86400), (i18n.reminder.week(), 7 * 86400)]
+
+    return {'prompt': i18n.reminder.prompt(title=note_name), 'delays': delays,
+            'reminder': due and i18n.reminder.set(date=_format_due(due)),
+            'remove_btn': i18n.reminder.remove(), 'back_btn': i18n.back()}
+
+
+@timed_handler
+async def stats_getter(event_from_user: User, i18n: TranslatorRunner, **kwargs) -> Dict[str, str]:
+    """
+    Get the usage statistics from the counters, for administrators only.
+
+    Args:
+        event_from_user: The user the statistics are shown to.
+        i18n: Translator runner instance.
+
+    Returns:
+        A dictionary containing the statistics message.
     """
-    note = dialog_manager.dialog_data.get('note')
+    if event_from_user.id not in ADMINS:
+        return {'stats': i18n.stats.denied(), 'refresh_btn': i18n.refresh(), 'back_btn': i18n.back()}
+
+    summary = await Stats.summary(STATS_TOP)
+    lines = [i18n.stats.title(), '',
+             i18n.stats.users(users=summary.users, day=summary.active_day, week=summary.active_week),
+             i18n.stats.notes(notes=summary.notes, size=summary.size)]
+    if summary.top:
+        lines += ['', i18n.stats.top()]
+        lines += [i18n.stats.user(user=user.user_id, notes=user.notes, size=user.size) for user in summary.top]
 
-    if note:
-        return {'note': note, 'notes': False, 'notes_items': False,
-                'delete_btn': i18n.delete(), 'back_btn': i18n.back()}
-    return {'note': note, 'delete_btn': i18n.delete(), 'back_btn': i18n.back()}
+    return {'stats': '\n'.join(lines), 'refresh_btn': i18n.refresh(), 'back_btn': i18n.back()}
 
 
+@timed_handler
 async def add_note_menu_getter(dialog_manager: DialogManager, i18n: TranslatorRunner,
                                **kwargs) -> Dict[str, Union[bool, str]]:
     """
@@ -150,3 +362,17 @@ async def add_note_menu_getter(dialog_manager: DialogManager, i18n: TranslatorRu
     else:
         dialog_manager.dialog_data['note'] = True
         return {'note_body': True, 'note': i18n.enter.note(), 'cancel_btn': i18n.cancel(), 'back_btn': i18n.back()}
+
+
+@timed_handler
+async def import_getter(i18n: TranslatorRunner, **kwargs) -> Dict[str, str]:
+    """
+    Get localized texts of the import window.
+
+    Args:
+        i18n: Translator runner instance.
+
+    Returns:
+        A dictionary containing the import instructions.
+    """
+    return {'send_file': i18n.send.file(), 'back_btn': i18n.back()}
@@ -1,24 +1,48 @@
+import os
+import re
+import time
 from typing import TYPE_CHECKING
 
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, FSInputFile, Message
 from aiogram_dialog import DialogManager
 from aiogram_dialog.manager.manager import ManagerImpl
 from aiogram_dialog.widgets.common import ManagedScroll
 from aiogram_dialog.widgets.input import MessageInput
-from aiogram_dialog.widgets.kbd import Button
+from aiogram_dialog.widgets.kbd import Button, ManagedRadio, Select
 from fluentogram import TranslatorRunner
 
-from database import DBInterface
+from database import DBInterface, NotesIndex, Reminders, SearchIndex, Stats
 from log_config import logger
 from states import NotesSG
+from utils.i18n import runner_locale
+from utils.metrics import timed_handler
+from utils.notes_io import export_notes, import_document
 
 if TYPE_CHECKING:
     from locales.stub import TranslatorRunner
 
-# Aliases for database functions
-add_note = DBInterface.hset_data
-get_all = DBInterface.hget_all
-remove = DBInterface.hdel
+# Seconds in the units of a reminder delay such as 1d 12h
+DELAY_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# Longest reminder delay in seconds
+MAX_DELAY = 366 * 86400
+
+
+def _parse_delay(text: str) -> int | None:
+    """
+    Parse a reminder delay made of numbers with units, such as 30m, 2h or 1d 12h.
+
+    Args:
+        text: The delay sent by the user.
+
+    Returns:
+        The delay in seconds, or None if the text is not a valid delay.
+    """
+    text = text.strip().lower()
+    if not re.fullmatch(r'(\d+\s*[mhdw]\s*)+', text):
+        return None
+    delay = sum(int(number) * DELAY_UNITS[unit] for number, unit in re.findall(r'(\d+)\s*([mhdw])', text))
+    return delay if 0 < delay <= MAX_DELAY else None
 
 
 async def _pop_extra_data(manager: DialogManager) -> None:
@@ -32,6 +56,7 @@ async def _pop_extra_data(manager: DialogManager) -> None:
     manager.dialog_data.pop('note', None)
 
 
+@timed_handler
 async def save_note_handler(message: Message, widget: MessageInput, manager: DialogManager) -> None:
     """
     Handle the saving of a note.
@@ -50,7 +75,12 @@ async def save_note_handler(message: Message, widget: MessageInput, manager: Dia
 
         user_id = str(message.from_user.id)
 
-        await add_note(name=user_id, mapping={name.capitalize(): note})
+        await NotesIndex.ensure(user_id)
+        async with DBInterface.batch(transaction=True) as batch:
+            batch.hset_data(name=user_id, mapping={name.capitalize(): note})
+            previous = await NotesIndex.add(user_id, name.capitalize(), note, batch)
+            await SearchIndex.add(user_id, name.capitalize(), note, batch)
+            await Stats.saved(user_id, {name.capitalize(): note}, [previous], batch)
 
         logger.info(f'{user_id} saved the note')
 
@@ -61,22 +91,25 @@ async def save_note_handler(message: Message, widget: MessageInput, manager: Dia
     await message.delete()
 
 
+@timed_handler
 async def get_note_handler(call: CallbackQuery, button: Button, manager: DialogManager, note_name: str) -> None:
     """
-    Handle the retrieval of a note.
+    Handle the selection of a note.
+
+    Only the title is kept in the dialog data, the body is read by note_getter,
+    so it is not written to the FSM storage with every update.
 
     Args:
         call: The callback query instance.
         button: The button instance.
         manager: Dialog manager instance.
-        note_name: The name of the note to retrieve.
+        note_name: The name of the selected note.
     """
-    user_id = str(call.from_user.id)
-    data = await get_all(user_id)
-    note = data.get(note_name)
-    manager.dialog_data['note'], manager.dialog_data['note_name'] = note, note_name
+    manager.dialog_data['note_name'] = note_name
+    await manager.find('note_pages').set_page(0)
 
 
+@timed_handler
 async def save_page_number(call: CallbackQuery, scroll: ManagedScroll, manager: ManagerImpl) -> None:
     """
     Save the current page number in the dialog manager.
@@ -89,6 +122,22 @@ async def save_page_number(call: CallbackQuery, scroll: ManagedScroll, manager:
     manager.start_data['page_number'] = await scroll.get_page()
 
 
+@timed_handler
+async def sort_handler(call: CallbackQuery, radio: ManagedRadio, manager: DialogManager, order: str) -> None:
+    """
+    Handle a change of the notes list sort order by returning to the first page.
+
+    Args:
+        call: The callback query instance.
+        radio: The managed radio instance.
+        manager: Dialog manager instance.
+        order: The selected sort order.
+    """
+    await manager.find('notes_pages').set_page(0)
+    manager.start_data['page_number'] = 0
+
+
+@timed_handler
 async def remove_handler(call: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """
     Handle the removal of a note.
@@ -100,11 +149,156 @@ async def remove_handler(call: CallbackQuery, button: Button, manager: DialogMan
     """
     user_id = str(call.from_user.id)
     note_name = manager.dialog_data.get('note_name')
-    await remove(user_id, [note_name])
+    meta, = await NotesIndex.meta(user_id, [note_name])
+    async with DBInterface.batch(transaction=True) as batch:
+        batch.hdel(user_id, [note_name])
+        await NotesIndex.remove(user_id, note_name, batch)
+        await SearchIndex.remove(user_id, note_name, batch)
+        await Reminders.cancel(user_id, note_name, batch)
+        await Stats.removed(user_id, meta, batch)
     logger.info(f'{user_id} deleted the note')
     await _pop_extra_data(manager)
 
 
+async def _schedule_reminder(manager: DialogManager, user_id: str, delay: int) -> None:
+    """
+    Set the reminder of the selected note and return to the note.
+
+    Args:
+        manager: Dialog manager instance.
+        user_id: The ID of the user owning the note.
+        delay: The number of seconds until the reminder is sent.
+    """
+    i18n: TranslatorRunner = manager.middleware_data.get('i18n')
+    await Reminders.schedule(user_id, manager.dialog_data['note_name'], time.time() + delay, runner_locale(i18n))
+    logger.info(f'{user_id} set a reminder')
+    await manager.switch_to(state=NotesSG.notes_list)
+
+
+@timed_handler
+async def remind_handler(call: CallbackQuery, widget: Select, manager: DialogManager, delay: str) -> None:
+    """
+    Handle the choice of a preset reminder delay.
+
+    Args:
+        call: The callback query instance.
+        widget: The select widget.
+        manager: Dialog manager instance.
+        delay: The selected delay in seconds.
+    """
+    await _schedule_reminder(manager, str(call.from_user.id), int(delay))
+
+
+@timed_handler
+async def reminder_input_handler(message: Message, widget: MessageInput, manager: DialogManager) -> None:
+    """
+    Handle a reminder delay sent as a message.
+
+    Args:
+        message: The message instance containing the delay.
+        widget: The message input widget.
+        manager: Dialog manager instance.
+    """
+    delay = _parse_delay(message.text)
+    if delay is None:
+        i18n: TranslatorRunner = manager.middleware_data.get('i18n')
+        await message.answer(i18n.reminder.invalid())
+    else:
+        await _schedule_reminder(manager, str(message.from_user.id), delay)
+
+    await message.delete()
+
+
+@timed_handler
+async def cancel_reminder_handler(call: CallbackQuery, button: Button, manager: DialogManager) -> None:
+    """
+    Handle the removal of the reminder of the selected note.
+
+    Args:
+        call: The callback query instance.
+        button: The button instance.
+        manager: Dialog manager instance.
+    """
+    i18n: TranslatorRunner = manager.middleware_data.get('i18n')
+    user_id = str(call.from_user.id)
+    await Reminders.cancel(user_id, manager.dialog_data['note_name'])
+    logger.info(f'{user_id} removed a reminder')
+    await call.answer(i18n.reminder.removed())
+    await manager.switch_to(state=NotesSG.notes_list)
+
+
+@timed_handler
+async def search_handler(message: Message, widget: MessageInput, manager: DialogManager) -> None:
+    """
+    Handle a search query.
+
+    Args:
+        message: The message instance containing the query.
+        widget: The message input widget.
+        manager: Dialog manager instance.
+    """
+    user_id = str(message.from_user.id)
+    await _pop_extra_data(manager)
+    manager.dialog_data['query'] = message.text
+    await SearchIndex.search(user_id, message.text)
+    await manager.find('search_pages').set_page(0)
+
+    logger.info(f'{user_id} searched the notes')
+
+    await message.delete()
+
+
+@timed_handler
+async def import_handler(message: Message, widget: MessageInput, manager: DialogManager) -> None:
+    """
+    Handle an uploaded file with notes to import.
+
+    Args:
+        message: The message instance containing the document.
+        widget: The message input widget.
+        manager: Dialog manager instance.
+    """
+    i18n: TranslatorRunner = manager.middleware_data.get('i18n')
+    user_id = str(message.from_user.id)
+
+    try:
+        count = await import_document(message.bot, message.document, user_id)
+    except ValueError:
+        logger.exception(f'{user_id} failed to import notes')
+        await message.answer(i18n.file.error())
+        return
+
+    logger.info(f'{user_id} imported {count} notes')
+
+    await message.answer(i18n.imported.count(count=count))
+    await manager.switch_to(state=NotesSG.notes_menu)
+
+
+@timed_handler
+async def export_handler(call: CallbackQuery, button: Button, manager: DialogManager) -> None:
+    """
+    Handle the export of all notes to a file.
+
+    Args:
+        call: The callback query instance.
+        button: The button instance.
+        manager: Dialog manager instance.
+    """
+    i18n: TranslatorRunner = manager.middleware_data.get('i18n')
+    user_id = str(call.from_user.id)
+    path, count = await export_notes(user_id)
+
+    try:
+        if count:
+            await call.message.answer_document(FSInputFile(path, filename='notes.jsonl'))
+            logger.info(f'{user_id} exported {count} notes')
+        else:
+            await call.answer(i18n.no.notes())
+    finally:
+        os.remove(path)
+
+
+@timed_handler
 async def cancel_handler(call: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """
     Handle the cancellation of the current operation.
@@ -120,6 +314,7 @@ async def cancel_handler(call: CallbackQuery, button: Button, manager: DialogMan
         manager.dialog_data.pop('note')
 
 
+@timed_handler
 async def back_handler(call: CallbackQuery, button: Button, manager: DialogManager) -> None:
     """
     Handle the back button action.
@@ -129,10 +324,9 @@ async def back_handler(call: CallbackQuery, button: Button, manager: DialogManag
         button: The button instance.
         manager: Dialog manager instance.
     """
-    note = manager.dialog_data.get('note')
-
-    if note:
+    if manager.dialog_data.get('note_name'):
         await _pop_extra_data(manager)
     else:
         manager.start_data['start_amount'] = 0
+        manager.dialog_data.pop('query', None)
         await manager.switch_to(NotesSG.notes_menu)
@@ -0,0 +1,24 @@
+from aiogram.enums import ContentType
+from aiogram_dialog import Window
+from aiogram_dialog.widgets.input import MessageInput
+from aiogram_dialog.widgets.kbd import SwitchTo
+from aiogram_dialog.widgets.text import Format
+
+from dialogs.windows.notes.getters import import_getter
+from dialogs.windows.notes.handlers import import_handler
+from states import NotesSG
+
+import_window = Window(
+    Format('{send_file}'),
+    MessageInput(
+        func=import_handler,
+        content_types=ContentType.DOCUMENT,
+    ),
+    SwitchTo(
+        Format('{back_btn}'),
+        state=NotesSG.notes_menu,
+        id='back'
+    ),
+    getter=import_getter,
+    state=NotesSG.import_notes
+)
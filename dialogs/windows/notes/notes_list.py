@@ -1,20 +1,32 @@
 from operator import itemgetter
 
 from aiogram_dialog import Window
-from aiogram_dialog.widgets.kbd import Button, ScrollingGroup, Select
+from aiogram_dialog.widgets.kbd import (Button, CurrentPage, FirstPage, Group, LastPage, NextPage, PrevPage, Radio,
+                                        Row, Select, StubScroll, SwitchTo)
 from aiogram_dialog.widgets.text import Format
 
-from config.config import Config, load_config
+from config.config import Config, get_config
 from dialogs.windows.notes.getters import notes_list_getter, note_getter
-from dialogs.windows.notes.handlers import get_note_handler, back_handler, remove_handler, save_page_number
+from dialogs.windows.notes.handlers import (get_note_handler, back_handler, remove_handler, save_page_number,
+                                            sort_handler)
 from states import NotesSG
 
-config: Config = load_config()
+config: Config = get_config()
 
 notes_list_window = Window(
     Format('{notes}', when='notes'),
     Format('{note}', when='note'),
-    ScrollingGroup(
+    Format('{reminder}', when='reminder'),
+    StubScroll(
+        id='notes_pages',
+        pages='pages',
+        on_page_changed=save_page_number
+    ),
+    StubScroll(
+        id='note_pages',
+        pages='note_pages'
+    ),
+    Group(
         Select(
             text=Format(text='{item[0]}'),
             item_id_getter=itemgetter(1),
@@ -22,13 +34,38 @@ notes_list_window = Window(
             items='notes_items',
             on_click=get_note_handler
         ),
-        id='notes_list',
         width=config.tg_bot.pag_page_size,
-        height=config.tg_bot.pag_height,
-        hide_on_single_page=True,
-        on_page_changed=save_page_number,
         when='notes_items'
     ),
+    Radio(
+        checked_text=Format('• {item[0]}'),
+        unchecked_text=Format('{item[0]}'),
+        id='sort',
+        item_id_getter=itemgetter(1),
+        items='sort_items',
+        on_state_changed=sort_handler,
+        when='sortable'
+    ),
+    Row(
+        FirstPage(scroll='notes_pages', text=Format('{target_page1}')),
+        PrevPage(scroll='notes_pages'),
+        CurrentPage(scroll='notes_pages'),
+        NextPage(scroll='notes_pages'),
+        LastPage(scroll='notes_pages', text=Format('{target_page1}')),
+        when='paged'
+    ),
+    Row(
+        PrevPage(scroll='note_pages', id='note_pager'),
+        CurrentPage(scroll='note_pages', id='note_pager'),
+        NextPage(scroll='note_pages', id='note_pager'),
+        when='note_paged'
+    ),
+    SwitchTo(
+        Format('{remind_btn}'),
+        state=NotesSG.reminder,
+        id='remind',
+        when='note'
+    ),
     Button(
         Format('{delete_btn}'),
         id='remove',
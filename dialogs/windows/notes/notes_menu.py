@@ -1,8 +1,9 @@
 from aiogram_dialog import Window
-from aiogram_dialog.widgets.kbd import Group, SwitchTo
+from aiogram_dialog.widgets.kbd import Button, Group, SwitchTo
 from aiogram_dialog.widgets.text import Format
 
 from dialogs.windows.notes.getters import menu_texts_getter
+from dialogs.windows.notes.handlers import export_handler
 from states import NotesSG
 
 notes_menu = Window(
@@ -18,6 +19,27 @@ notes_menu = Window(
             state=NotesSG.add_note,
             id='add_note',
         ),
+        SwitchTo(
+            Format('{search_text}'),
+            state=NotesSG.search,
+            id='search',
+        ),
+        SwitchTo(
+            Format('{upload_text}'),
+            state=NotesSG.import_notes,
+            id='import_notes',
+        ),
+        Button(
+            Format('{download_text}'),
+            id='export_notes',
+            on_click=export_handler
+        ),
+        SwitchTo(
+            Format('{stats_text}'),
+            state=NotesSG.stats,
+            id='stats',
+            when='is_admin'
+        ),
         width=2
     ),
     getter=menu_texts_getter,
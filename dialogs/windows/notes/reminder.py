@@ -0,0 +1,43 @@
+from operator import itemgetter
+
+from aiogram.enums import ContentType
+from aiogram_dialog import Window
+from aiogram_dialog.widgets.input import MessageInput
+from aiogram_dialog.widgets.kbd import Button, Group, Select, SwitchTo
+from aiogram_dialog.widgets.text import Format
+
+from dialogs.windows.notes.getters import reminder_getter
+from dialogs.windows.notes.handlers import cancel_reminder_handler, remind_handler, reminder_input_handler
+from states import NotesSG
+
+reminder_window = Window(
+    Format('{prompt}'),
+    Format('{reminder}', when='reminder'),
+    MessageInput(
+        func=reminder_input_handler,
+        content_types=ContentType.TEXT,
+    ),
+    Group(
+        Select(
+            text=Format(text='{item[0]}'),
+            item_id_getter=itemgetter(1),
+            id='delay',
+            items='delays',
+            on_click=remind_handler
+        ),
+        width=2
+    ),
+    Button(
+        Format('{remove_btn}'),
+        id='remove_reminder',
+        on_click=cancel_reminder_handler,
+        when='reminder'
+    ),
+    SwitchTo(
+        Format('{back_btn}'),
+        state=NotesSG.notes_list,
+        id='back_to_note'
+    ),
+    getter=reminder_getter,
+    state=NotesSG.reminder
+)
@@ -0,0 +1,70 @@
+from operator import itemgetter
+
+from aiogram.enums import ContentType
+from aiogram_dialog import Window
+from aiogram_dialog.widgets.input import MessageInput
+from aiogram_dialog.widgets.kbd import (Button, CurrentPage, FirstPage, Group, LastPage, NextPage, PrevPage, Row,
+                                        Select, StubScroll)
+from aiogram_dialog.widgets.text import Format
+
+from config.config import Config, get_config
+from dialogs.windows.notes.getters import search_getter, note_getter
+from dialogs.windows.notes.handlers import get_note_handler, back_handler, remove_handler, search_handler
+from states import NotesSG
+
+config: Config = get_config()
+
+search_window = Window(
+    Format('{notes}', when='notes'),
+    Format('{note}', when='note'),
+    MessageInput(
+        func=search_handler,
+        content_types=ContentType.TEXT,
+    ),
+    StubScroll(
+        id='search_pages',
+        pages='pages'
+    ),
+    StubScroll(
+        id='note_pages',
+        pages='note_pages'
+    ),
+    Group(
+        Select(
+            text=Format(text='{item[0]}'),
+            item_id_getter=itemgetter(1),
+            id='found_note',
+            items='notes_items',
+            on_click=get_note_handler
+        ),
+        width=config.tg_bot.pag_page_size,
+        when='notes_items'
+    ),
+    Row(
+        FirstPage(scroll='search_pages', text=Format('{target_page1}')),
+        PrevPage(scroll='search_pages'),
+        CurrentPage(scroll='search_pages'),
+        NextPage(scroll='search_pages'),
+        LastPage(scroll='search_pages', text=Format('{target_page1}')),
+        when='paged'
+    ),
+    Row(
+        PrevPage(scroll='note_pages', id='note_pager'),
+        CurrentPage(scroll='note_pages', id='note_pager'),
+        NextPage(scroll='note_pages', id='note_pager'),
+        when='note_paged'
+    ),
+    Button(
+        Format('{delete_btn}'),
+        id='remove',
+        on_click=remove_handler,
+        when='note'
+    ),
+    Button(
+        Format('{back_btn}'),
+        id='back',
+        on_click=back_handler
+    ),
+    getter=(search_getter, note_getter),
+    state=NotesSG.search
+)
@@ -0,0 +1,21 @@
+from aiogram_dialog import Window
+from aiogram_dialog.widgets.kbd import Button, SwitchTo
+from aiogram_dialog.widgets.text import Format
+
+from dialogs.windows.notes.getters import stats_getter
+from states import NotesSG
+
+stats_window = Window(
+    Format('{stats}'),
+    Button(
+        Format('{refresh_btn}'),
+        id='refresh'
+    ),
+    SwitchTo(
+        Format('{back_btn}'),
+        state=NotesSG.notes_menu,
+        id='back'
+    ),
+    getter=stats_getter,
+    state=NotesSG.stats
+)
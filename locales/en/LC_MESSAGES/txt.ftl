@@ -16,4 +16,72 @@ back = Back
 
 no-notes = There are no notes
 
+search-notes = Search
+
+enter-query = Enter a search query
+
+search-results = Found notes: { $count }
+
+no-results = Nothing found
+
+upload-notes = Import
+
+download-notes = Export
+
+send-file = Send a file with notes: JSON lines (.jsonl) or a JSON array (.json) of objects with title and note keys, Markdown (.md) with a # heading before every note or a zip of text files named after the notes
+
+imported-count = Imported notes: { $count }
+
+file-error = Could not read the file
+
+sort-oldest = Oldest
+
+sort-newest = Newest
+
+sort-title = A–Z
+
+sort-edited = Edited
+
+note-info = { $date }, { $size } chars
+
+note-size = { $size } chars
+
+throttled = Too many requests, please slow down
+
+remind = Remind
+
+reminder-prompt = When should I remind you about { $title }? Choose a delay or send one like 30m, 2h or 1d 12h
+
+reminder-set = Reminder: { $date }
+
+reminder-invalid = Send a delay like 30m, 2h or 1d 12h, up to a year
+
+reminder-remove = Remove reminder
+
+reminder-removed = Reminder removed
+
+reminder-fired = Reminder about { $title }
+
+reminder-hour = In an hour
+
+reminder-hours = In 3 hours
+
+reminder-day = In a day
+
+reminder-week = In a week
+
+stats-title = Statistics
+
+stats-users = Users: { $users }, active in a day: { $day }, in a week: { $week }
+
+stats-notes = Notes: { $notes }, characters: { $size }
+
+stats-top = Largest collections:
+
+stats-user = { $user }: notes: { $notes }, characters: { $size }
+
+stats-denied = Statistics are only available to administrators
+
+refresh = Refresh
+
 cancel = Cancel
\ No newline at end of file
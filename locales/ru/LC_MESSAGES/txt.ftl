@@ -16,4 +16,72 @@ back = Назад
 
 no-notes = Заметки отсутствуют
 
+search-notes = Поиск
+
+enter-query = Введите поисковый запрос
+
+search-results = Найдено заметок: { $count }
+
+no-results = Ничего не найдено
+
+upload-notes = Импорт
+
+download-notes = Экспорт
+
+send-file = Отправьте файл с заметками: JSON lines (.jsonl) или JSON-массив (.json) объектов с ключами title и note, Markdown (.md) с заголовком # перед каждой заметкой или zip-архив текстовых файлов с названиями заметок
+
+imported-count = Импортировано заметок: { $count }
+
+file-error = Не удалось прочитать файл
+
+sort-oldest = Старые
+
+sort-newest = Новые
+
+sort-title = А–Я
+
+sort-edited = Изменённые
+
+note-info = { $date }, символов: { $size }
+
+note-size = символов: { $size }
+
+throttled = Слишком много запросов, пожалуйста, помедленнее
+
+remind = Напомнить
+
+reminder-prompt = Когда напомнить о заметке { $title }? Выберите срок или отправьте его, например 30m, 2h или 1d 12h
+
+reminder-set = Напоминание: { $date }
+
+reminder-invalid = Отправьте срок, например 30m, 2h или 1d 12h, не больше года
+
+reminder-remove = Удалить напоминание
+
+reminder-removed = Напоминание удалено
+
+reminder-fired = Напоминание о заметке { $title }
+
+reminder-hour = Через час
+
+reminder-hours = Через 3 часа
+
+reminder-day = Через день
+
+reminder-week = Через неделю
+
+stats-title = Статистика
+
+stats-users = Пользователей: { $users }, активных за день: { $day }, за неделю: { $week }
+
+stats-notes = Заметок: { $notes }, символов: { $size }
+
+stats-top = Самые большие коллекции:
+
+stats-user = { $user }: заметок: { $notes }, символов: { $size }
+
+stats-denied = Статистика доступна только администраторам
+
+refresh = Обновить
+
 cancel = Отмена
\ No newline at end of file
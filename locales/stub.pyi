@@ -1,5 +1,10 @@
 from typing import Literal
 
+from decimal import Decimal
+from datetime import datetime, date
+
+PossibleValue = str | int | float | Decimal | bool | datetime | date
+
     
 class TranslatorRunner:
     def get(self, path: str, **kwargs) -> str: ...
@@ -9,6 +14,16 @@ class TranslatorRunner:
     add: Add
     enter: Enter
     no: No
+    search: Search
+    upload: Upload
+    download: Download
+    send: Send
+    imported: Imported
+    file: File
+    sort: Sort
+    note: Note
+    reminder: Reminder
+    stats: Stats
 
     @staticmethod
     def delete() -> Literal["""Delete"""]: ...
@@ -22,6 +37,15 @@ class TranslatorRunner:
     @staticmethod
     def cancel() -> Literal["""Cancel"""]: ...
 
+    @staticmethod
+    def remind() -> Literal["""Remind"""]: ...
+
+    @staticmethod
+    def refresh() -> Literal["""Refresh"""]: ...
+
+    @staticmethod
+    def throttled() -> Literal["""Too many requests, please slow down"""]: ...
+
 
 class Command:
     @staticmethod
@@ -45,8 +69,120 @@ class Enter:
     @staticmethod
     def note() -> Literal["""Enter a note"""]: ...
 
+    @staticmethod
+    def query() -> Literal["""Enter a search query"""]: ...
+
 
 class No:
     @staticmethod
     def notes() -> Literal["""There are no notes"""]: ...
 
+    @staticmethod
+    def results() -> Literal["""Nothing found"""]: ...
+
+
+class Search:
+    @staticmethod
+    def notes() -> Literal["""Search"""]: ...
+
+    @staticmethod
+    def results(*, count: PossibleValue) -> Literal["""Found notes: { $count }"""]: ...
+
+
+class Upload:
+    @staticmethod
+    def notes() -> Literal["""Import"""]: ...
+
+
+class Download:
+    @staticmethod
+    def notes() -> Literal["""Export"""]: ...
+
+
+class Send:
+    @staticmethod
+    def file() -> Literal["""Send a file with notes: JSON lines (.jsonl) with title and note keys, Markdown (.md) with a # heading before every note or a zip of text files named after the notes"""]: ...
+
+
+class Imported:
+    @staticmethod
+    def count(*, count: PossibleValue) -> Literal["""Imported notes: { $count }"""]: ...
+
+
+class File:
+    @staticmethod
+    def error() -> Literal["""Could not read the file"""]: ...
+
+
+class Sort:
+    @staticmethod
+    def oldest() -> Literal["""Oldest"""]: ...
+
+    @staticmethod
+    def newest() -> Literal["""Newest"""]: ...
+
+    @staticmethod
+    def title() -> Literal["""A–Z"""]: ...
+
+    @staticmethod
+    def edited() -> Literal["""Edited"""]: ...
+
+
+class Note:
+    @staticmethod
+    def info(*, date: PossibleValue, size: PossibleValue) -> Literal["""{ $date }, { $size } chars"""]: ...
+
+    @staticmethod
+    def size(*, size: PossibleValue) -> Literal["""{ $size } chars"""]: ...
+
+
+class Reminder:
+    @staticmethod
+    def prompt(*, title: PossibleValue) -> Literal["""When should I remind you about { $title }? Choose a delay or send one like 30m, 2h or 1d 12h"""]: ...
+
+    @staticmethod
+    def set(*, date: PossibleValue) -> Literal["""Reminder: { $date }"""]: ...
+
+    @staticmethod
+    def invalid() -> Literal["""Send a delay like 30m, 2h or 1d 12h, up to a year"""]: ...
+
+    @staticmethod
+    def remove() -> Literal["""Remove reminder"""]: ...
+
+    @staticmethod
+    def removed() -> Literal["""Reminder removed"""]: ...
+
+    @staticmethod
+    def fired(*, title: PossibleValue) -> Literal["""Reminder about { $title }"""]: ...
+
+    @staticmethod
+    def hour() -> Literal["""In an hour"""]: ...
+
+    @staticmethod
+    def hours() -> Literal["""In 3 hours"""]: ...
+
+    @staticmethod
+    def day() -> Literal["""In a day"""]: ...
+
+    @staticmethod
+    def week() -> Literal["""In a week"""]: ...
+
+
+class Stats:
+    @staticmethod
+    def title() -> Literal["""Statistics"""]: ...
+
+    @staticmethod
+    def users(*, users: PossibleValue, day: PossibleValue, week: PossibleValue) -> Literal["""Users: { $users }, active in a day: { $day }, in a week: { $week }"""]: ...
+
+    @staticmethod
+    def notes(*, notes: PossibleValue, size: PossibleValue) -> Literal["""Notes: { $notes }, characters: { $size }"""]: ...
+
+    @staticmethod
+    def top() -> Literal["""Largest collections:"""]: ...
+
+    @staticmethod
+    def user(*, user: PossibleValue, notes: PossibleValue, size: PossibleValue) -> Literal["""{ $user }: notes: { $notes }, characters: { $size }"""]: ...
+
+    @staticmethod
+    def denied() -> Literal["""Statistics are only available to administrators"""]: ...
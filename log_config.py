@@ -1,27 +1,21 @@
+import atexit
+import json
 import os
 import sys
 import logging
 import logging.config
 import traceback
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from queue import SimpleQueue
 
-from icecream import install
-
-from config.config import Config, load_config
-
-# Install IceCream for debugging
-install()
+from config.config import Config, get_config
 
 # Load configuration
-config: Config = load_config()
+config: Config = get_config()
 
-# Create logs directory if it doesn't exist
+# Define the logs directory, created when logging is set up, and the name of the log files
 logs_dir = os.path.join(os.path.dirname(__file__), 'logs')
-if not os.path.exists(logs_dir):
-    os.mkdir(logs_dir)
-
-# Define the log filename
-filename = os.path.join(logs_dir, 'bot_logs.log')
+LOG_NAME = 'bot_logs'
 
 # Set log level from config
 LOG_LEVEL = config.logs_level
@@ -31,18 +25,53 @@ LOG_LEVEL = getattr(logging, LOG_LEVEL)
 logger = logging.getLogger()
 logger.setLevel(LOG_LEVEL)
 
-# Define the log format for the file handler
-file_formatter = logging.Formatter('%(asctime)s | %(funcName)s | %(levelname)s | %(message)s',
-                                   datefmt='%H:%M:%S')
 
-# Set up a timed rotating file handler
-log_file_handler = TimedRotatingFileHandler(filename=filename, when='midnight', interval=1,
-                                            encoding='utf-8', backupCount=50)
-log_file_handler.suffix = "%d-%m-%Y"
-log_file_handler.setFormatter(file_formatter)
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter writing every record as a single JSON line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a log record as JSON.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            The JSON line representing the record.
+        """
+        data = {
+            'time': self.formatTime(record, self.datefmt),
+            'func': record.funcName,
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler passing records to the listener as they are.
+
+    QueueHandler formats every record before queueing it, on the thread that logged it.
+    The records are only formatted by the handlers of the listener instead, so neither
+    the message nor a traceback is rendered on the event loop thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Prepare a record for queueing without formatting it.
+
+        Args:
+            record: The log record.
 
-# Add the file handler to the logger
-logger.addHandler(log_file_handler)
+        Returns:
+            The same record.
+        """
+        return record
 
 
 def exception_handler(exc_type, exc_value, exc_traceback) -> None:
@@ -62,5 +91,51 @@ def exception_handler(exc_type, exc_value, exc_traceback) -> None:
     logging.error('\n%s', tb_str)
 
 
-# Set the custom exception handler
-sys.excepthook = exception_handler
+# The listener writing the log file, started by setup_logging
+log_listener: QueueListener | None = None
+
+
+def setup_logging(process: str = '') -> None:
+    """
+    Start writing the log file and logging uncaught exceptions.
+
+    Importing the module only configures the logger, so tools importing the bot do not
+    touch the filesystem. The entry points call this once per process, later calls do nothing.
+    Every process writes and rotates a file of its own, since a process rolling a shared
+    file over at midnight would replace the previous day's file rolled over by another.
+
+    Args:
+        process: The name of a worker process, added to the name of its log file.
+    """
+    global log_listener
+    if log_listener is not None:
+        return
+
+    os.makedirs(logs_dir, exist_ok=True)
+
+    # Define the log format for the file handler
+    if config.logs_format == 'json':
+        file_formatter = JsonFormatter(datefmt='%Y-%m-%dT%H:%M:%S')
+    else:
+        file_formatter = logging.Formatter('%(asctime)s | %(funcName)s | %(levelname)s | %(message)s',
+                                           datefmt='%H:%M:%S')
+
+    # Set up a timed rotating file handler
+    filename = os.path.join(logs_dir, f'{LOG_NAME}.{process}.log' if process else f'{LOG_NAME}.log')
+    log_file_handler = TimedRotatingFileHandler(filename=filename, when='midnight', interval=1,
+                                                encoding='utf-8', backupCount=50)
+    log_file_handler.suffix = "%d-%m-%Y"
+    log_file_handler.setFormatter(file_formatter)
+
+    # Records are only put in a queue on the event loop thread,
+    # the listener thread formats them and does the file I/O and rollover
+    log_queue = SimpleQueue()
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    log_listener = QueueListener(log_queue, log_file_handler, respect_handler_level=True)
+    log_listener.start()
+
+    # Flush the queued records on exit
+    atexit.register(log_listener.stop)
+
+    # Set the custom exception handler
+    sys.excepthook = exception_handler
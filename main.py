@@ -1,32 +1,65 @@
 import asyncio
-from aiogram import Bot, Dispatcher
+import multiprocessing
+import time
+from contextlib import suppress
+from typing import TYPE_CHECKING, List
+
+from aiogram import Bot, Dispatcher, F, Router
 from aiogram.filters import Command
 from aiogram.methods import DeleteWebhook
 from aiogram.types import Message
 from aiogram_dialog import DialogManager, StartMode, setup_dialogs
-from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
+from aiogram.fsm.storage.redis import DefaultKeyBuilder
 from fluentogram import TranslatorHub
 
-from config.config import Config, load_config
+from config.config import Config, get_config
 from dialogs.dialogs import notes_dialog
-from log_config import logger
+from log_config import logger, setup_logging
+from middlewares.access import AccessMiddleware, Allowlist
+from middlewares.fanout import FanOutMiddleware
+from middlewares.flood import FloodControlMiddleware
 from middlewares.i18n import TranslatorRunnerMiddleware
+from middlewares.metrics import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+from middlewares.throttling import ThrottlingMiddleware
 from states.states import NotesSG
-from database import redis
+from database import CompactRedisStorage, Stats, create_queue_client, fsm_redis, redis
 from utils.i18n import create_translator_hub
+from utils.metrics import Gauges, registry, start_metrics_server
+from utils.reminders import deliver_reminders, owned_shards
+from utils.scheduler import UpdateScheduler
+from utils.startup import log_startup
+from utils.workers import POP_TIMEOUT, QUEUE_PREFIX, consume_updates
+
+if TYPE_CHECKING:
+    from aiohttp import web
 
-ic.prefix = ''
+# CPU time taken to import the bot, reported once it has started
+imported_at = time.process_time()
 
 # Load configuration
-config: Config = load_config()
+config: Config = get_config()
 
-# Setup storage with Redis
-storage = RedisStorage(redis, key_builder=DefaultKeyBuilder(prefix='notebot', with_destiny=True))
+# Setup storage with Redis, expiring the state of inactive users
+storage = CompactRedisStorage(fsm_redis, key_builder=DefaultKeyBuilder(prefix='notebot', with_destiny=True),
+                              state_ttl=config.db.fsm_state_ttl, data_ttl=config.db.fsm_data_ttl)
 bot = Bot(token=config.tg_bot.token)
-dp = Dispatcher(storage=storage, bot=bot)
 
-# List of allowed users
-allowed_users = config.tg_bot.allowed_users
+# Handle the updates of each user in order with a global concurrency limit
+scheduler = UpdateScheduler(concurrency=config.concurrency)
+dp = Dispatcher(storage=storage, bot=bot, events_isolation=scheduler)
+
+# Expose the scheduler backpressure
+registry.register(Gauges('notebot_scheduler', 'Update scheduler counter.', kind='counter',
+                         read=lambda: {key: scheduler.stats()[key] for key in ('handled', 'wait_time')}))
+registry.register(Gauges('notebot_scheduler', 'Update scheduler backpressure.',
+                         read=lambda: {key: scheduler.stats()[key]
+                                       for key in ('waiting', 'running', 'users', 'max_depth', 'max_wait')}))
+
+# Set of allowed users
+allowlist = Allowlist(config.tg_bot.allowed_users, key=config.tg_bot.allowed_users_key)
+
+# Router of the commands, the dialog handlers are registered by the notes dialog
+commands_router = Router(name='commands')
 
 
 async def _on_startup() -> None:
@@ -34,7 +67,10 @@ async def _on_startup() -> None:
     Function to be executed on bot startup.
     Logs the start of the bot.
     """
+    from icecream import ic
+
     logger.warning('Bot started')
+    ic.prefix = ''
     ic('Bot started')
 
 
@@ -46,12 +82,12 @@ async def _on_shutdown() -> None:
     logger.warning('Bot stopped')
 
 
-@dp.message(Command(commands=['start']))
+@commands_router.message(Command(commands=['start']))
 async def root_handler(message: Message, dialog_manager: DialogManager) -> None:
     """
     Handler for the /start command.
 
-    If the user is allowed, starts the notes dialog.
+    Starts the notes dialog. Updates of users who are not allowed never get here.
 
     Args:
         message: The incoming message with the /start command.
@@ -59,26 +95,255 @@ async def root_handler(message: Message, dialog_manager: DialogManager) -> None:
     """
     user_id = str(message.from_user.id)
     logger.info(f'User {user_id} joined')
-    if message.text == '/start' and user_id in allowed_users:
+    await Stats.seen(user_id)
+    if message.text == '/start':
         await dialog_manager.start(state=NotesSG.notes_menu, mode=StartMode.RESET_STACK, data={'page_number': 0})
 
 
-async def run() -> None:
+@commands_router.message(Command(commands=['stats']), F.from_user.id.in_(config.tg_bot.admins))
+async def stats_handler(message: Message, dialog_manager: DialogManager) -> None:
     """
-    Main function to run the bot.
+    Handler for the /stats command of the administrators.
 
-    Sets up the translator hub, middlewares, registers startup and shutdown
-    events, includes routers, and starts polling.
+    Opens the usage statistics, read from counters kept up to date by the handlers.
+
+    Args:
+        message: The incoming message with the /stats command.
+        dialog_manager: The dialog manager to control the state.
+    """
+    logger.info(f'Admin {message.from_user.id} opened the statistics')
+    await dialog_manager.start(state=NotesSG.stats, mode=StartMode.RESET_STACK, data={'page_number': 0})
+
+
+async def _set_webhook(bot: Bot) -> None:
+    """
+    Function to be executed on bot startup in webhook mode.
+    Points Telegram to the webhook route of the bot.
+
+    Args:
+        bot: The bot instance.
+    """
+    await bot.set_webhook(url=config.webhook.base_url + config.webhook.path,
+                          secret_token=config.webhook.secret or None, drop_pending_updates=True)
+    logger.warning(f'Webhook set on {config.webhook.path}')
+
+
+async def _run_polling(translator_hub: TranslatorHub) -> None:
+    """
+    Receive updates through long polling.
+
+    Args:
+        translator_hub: The translator hub passed to the middlewares.
+    """
+    await bot(DeleteWebhook(drop_pending_updates=True))
+    await dp.start_polling(bot, _translator_hub=translator_hub)
+
+
+def create_webhook_app(translator_hub: TranslatorHub) -> 'web.Application':
+    """
+    Create the aiohttp application serving webhook updates.
+
+    Requests without the configured secret token are rejected by the request handler.
+
+    Args:
+        translator_hub: The translator hub passed to the middlewares.
+
+    Returns:
+        The aiohttp application with the webhook route registered.
+    """
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=config.webhook.secret or None,
+        _translator_hub=translator_hub
+    ).register(app, path=config.webhook.path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def _run_webhook(translator_hub: TranslatorHub) -> None:
+    """
+    Receive updates through the webhook served by an aiohttp web server.
+
+    Args:
+        translator_hub: The translator hub passed to the middlewares.
+
+    Raises:
+        ValueError: If the public URL of the webhook is not configured.
+    """
+    from aiohttp import web
+
+    if not config.webhook.base_url:
+        raise ValueError('WEBHOOK_BASE_URL must be set to receive updates through a webhook')
+
+    dp.startup.register(_set_webhook)
+    runner = web.AppRunner(create_webhook_app(translator_hub))
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=config.webhook.host, port=config.webhook.port).start()
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def _setup_dispatcher(throttling: bool = True, fan_out: bool = False) -> TranslatorHub:
+    """
+    Set up the middlewares, startup and shutdown events and routers of the dispatcher.
+
+    Args:
+        throttling: Apply the user rate limit, disabled in workers since the receiving
+            process already applied it to the updates in their queues.
+        fan_out: Push the updates to the worker queues instead of handling them.
+
+    Returns:
+        The translator hub passed to the middlewares.
     """
     translator_hub: TranslatorHub = create_translator_hub()
+    limits = config.throttling
+
+    # Drop unauthorized and throttled updates, and forward the ones handled by the workers,
+    # before the FSM middleware locks the user and loads the state
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(AccessMiddleware(allowlist))
+    if throttling and limits.user_rate:
+        dp.update.outer_middleware(ThrottlingMiddleware(limits.user_rate, limits.user_burst))
+    if fan_out:
+        dp.update.outer_middleware(FanOutMiddleware(redis, config.workers))
+    dp.update.outer_middleware(dp.fsm)
+
+    # Every process sending requests gets an equal share of the global rate left by the reminders
+    global_rate = max(limits.global_rate - config.reminders.rate, 1.0) if limits.global_rate else 0.0
+    bot.session.middleware(FloodControlMiddleware(global_rate / config.workers, limits.chat_rate,
+                                                  limits.chat_burst, limits.max_retries))
+
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
     dp.update.middleware(TranslatorRunnerMiddleware())
+    commands_router.message.middleware(HandlerMetricsMiddleware())
     dp.startup.register(_on_startup)
     dp.shutdown.register(_on_shutdown)
-    dp.include_routers(notes_dialog)
+    dp.include_routers(commands_router, notes_dialog)
     setup_dialogs(dp)
-    await bot(DeleteWebhook(drop_pending_updates=True))
-    await dp.start_polling(bot, _translator_hub=translator_hub)
+    return translator_hub
+
+
+def _start_reminders(translator_hub: TranslatorHub, index: int, processes: int) -> asyncio.Task:
+    """
+    Start delivering the reminders of the due queues of a process in the background.
+
+    Reminders are sent by a bot with a session of its own, paced to the process's share
+    of the reminder rate, so they do not delay the replies to the updates.
+
+    Args:
+        translator_hub: The translator hub the reminders are translated with.
+        index: The number of the process.
+        processes: The number of processes delivering reminders.
+
+    Returns:
+        The task delivering the reminders.
+    """
+    limits, settings = config.throttling, config.reminders
+    reminder_bot = Bot(token=config.tg_bot.token)
+    reminder_bot.session.middleware(FloodControlMiddleware(settings.rate / processes, limits.chat_rate,
+                                                           limits.chat_burst, limits.max_retries))
+    shards = owned_shards(index, processes, settings.shards)
+    return asyncio.create_task(deliver_reminders(reminder_bot, translator_hub, shards, settings))
+
+
+async def _run_worker(index: int) -> None:
+    """
+    Handle the updates fanned out to a worker process.
+
+    Args:
+        index: The number of the worker.
+    """
+    translator_hub = _setup_dispatcher(throttling=False)
+    await allowlist.start(config.tg_bot.allowed_users_reload)
+    log_startup(imported_at)
+
+    if config.metrics_port:
+        await start_metrics_server(config.metrics_host, config.metrics_port + index + 1)
+
+    queue_client = create_queue_client(POP_TIMEOUT)
+    reminders = _start_reminders(translator_hub, index, config.workers)
+    try:
+        await consume_updates(queue_client, dp, bot, f'{QUEUE_PREFIX}:{index}', limit=config.concurrency,
+                              _translator_hub=translator_hub)
+    finally:
+        reminders.cancel()
+
+
+def _worker_main(index: int) -> None:
+    """
+    Entry point of a worker process.
+
+    Args:
+        index: The number of the worker.
+    """
+    setup_logging(f'worker-{index}')
+    with suppress(KeyboardInterrupt):
+        asyncio.run(_run_worker(index))
+
+
+def _spawn_workers(count: int) -> List[multiprocessing.Process]:
+    """
+    Start the worker processes.
+
+    Workers are spawned rather than forked so they do not inherit the event loop
+    or Redis connections of the receiving process.
+
+    Args:
+        count: The number of workers.
+
+    Returns:
+        The list of started processes.
+    """
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_worker_main, args=(index,), name=f'worker-{index}')
+                 for index in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+async def run() -> None:
+    """
+    Main function to run the bot.
+
+    Sets up the translator hub, middlewares, registers startup and shutdown
+    events, includes routers, and starts receiving updates through long polling
+    or the webhook, depending on the configuration. With several workers the
+    received updates are pushed to the worker queues instead of being handled here,
+    and the workers deliver the reminders.
+    """
+    translator_hub = _setup_dispatcher(fan_out=config.workers > 1)
+    await allowlist.start(config.tg_bot.allowed_users_reload)
+    log_startup(imported_at)
+    processes, reminders = [], None
+
+    if config.metrics_port:
+        await start_metrics_server(config.metrics_host, config.metrics_port)
+
+    if config.workers > 1:
+        processes = _spawn_workers(config.workers)
+    else:
+        reminders = _start_reminders(translator_hub, 0, 1)
+
+    try:
+        if config.webhook.enabled:
+            await _run_webhook(translator_hub)
+        else:
+            await _run_polling(translator_hub)
+    finally:
+        if reminders:
+            reminders.cancel()
+        for process in processes:
+            process.terminate()
 
 
 if __name__ == '__main__':
+    setup_logging()
     asyncio.run(run())
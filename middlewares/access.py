@@ -0,0 +1,106 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+from redis.exceptions import RedisError
+
+from database import DBInterface
+from log_config import logger
+
+
+class Allowlist:
+    """
+    The set of users allowed to use the bot.
+
+    It combines the IDs from the configuration with an optional Redis set, which is
+    reloaded periodically so users can be added or removed without a restart.
+    """
+
+    def __init__(self, users: Iterable[int], key: str = '') -> None:
+        """
+        Args:
+            users: The IDs of the users allowed by the configuration.
+            key: The name of a Redis set with more allowed user IDs, empty to disable it.
+        """
+        self.static = frozenset(users)
+        self.key = key
+        self.users: FrozenSet[int] = self.static
+        self._task: asyncio.Task | None = None
+
+    async def reload(self) -> None:
+        """
+        Read the allowed user IDs from the Redis set.
+        """
+        if not self.key:
+            return
+
+        members = await DBInterface.smembers(self.key)
+        self.users = self.static | {int(member) for member in members if member.isdigit()}
+
+    async def _watch(self, interval: int) -> None:
+        """
+        Reload the Redis set forever.
+
+        Args:
+            interval: The number of seconds between reloads.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except RedisError:
+                logger.exception('Failed to reload the allowed users')
+
+    async def start(self, interval: int) -> None:
+        """
+        Load the Redis set and keep reloading it in the background.
+
+        Args:
+            interval: The number of seconds between reloads.
+        """
+        if not self.key:
+            return
+
+        await self.reload()
+        self._task = asyncio.create_task(self._watch(interval))
+
+
+class AccessMiddleware(BaseMiddleware):
+    """
+    Outer middleware dropping the updates of users who are not allowed to use the bot.
+
+    It must be registered before the FSM middleware, so nothing is read from the
+    storage and no dialog or translation work is done for unauthorized updates.
+    """
+
+    def __init__(self, allowlist: Allowlist) -> None:
+        """
+        Args:
+            allowlist: The set of allowed users.
+        """
+        self.allowlist = allowlist
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Middleware handler function.
+
+        Args:
+            handler: The next handler to call.
+            event: The current Telegram update.
+            data: The data dictionary for the current context.
+
+        Returns:
+            The result of the next handler, or None for dropped updates.
+        """
+        user: User | None = data.get('event_from_user')
+
+        if user is None or user.id not in self.allowlist.users:
+            return None
+
+        return await handler(event, data)
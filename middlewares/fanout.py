@@ -0,0 +1,53 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+from redis.asyncio.client import Redis
+
+from utils.scheduler import UserLocks
+from utils.workers import update_queue
+
+
+class FanOutMiddleware(BaseMiddleware):
+    """
+    Outer middleware that pushes every update to the queue of a worker process
+    instead of handling it in the receiving process.
+
+    It is registered before the FSM middleware, so forwarded updates take no scheduler
+    slot and load no state. The updates of a user are pushed one at a time, so they
+    reach the queue in the order they arrived even on different pool connections.
+    """
+
+    def __init__(self, redis: Redis, workers: int) -> None:
+        """
+        Args:
+            redis: The Redis client the queues live in.
+            workers: The number of worker processes.
+        """
+        self.redis = redis
+        self.workers = workers
+        self.locks = UserLocks()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Middleware handler function.
+
+        Args:
+            handler: The next handler, which is never called.
+            event: The current Telegram update.
+            data: The data dictionary for the current context.
+        """
+        user: User | None = data.get('event_from_user')
+        queue = update_queue(user.id if user else None, self.workers)
+        update = event.model_dump_json(exclude_unset=True)
+
+        if user is None:
+            await self.redis.rpush(queue, update)
+            return
+        async with self.locks.hold(user.id):
+            await self.redis.rpush(queue, update)
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+from log_config import logger
+from utils.metrics import retry_after_total
+
+# Number of per-chat buckets kept before the idle ones are dropped
+MAX_CHATS = 10000
+
+# Prefixes of the Bot API methods posting a new message, the ones limited per chat
+SENDING_METHODS = ('Send', 'Copy', 'Forward')
+
+
+class TokenBucket:
+    """
+    An in-process token bucket pacing requests to a rate with bursts.
+
+    Tokens may go negative: every request reserves a token and waits until it
+    would have been refilled, so concurrent requests are spread out in order.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """
+        Args:
+            rate: The number of requests per second.
+            burst: The number of requests that may be sent at once after being idle.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """
+        Add the tokens refilled since the last update.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self) -> float:
+        """
+        Take a token.
+
+        Returns:
+            The number of seconds to wait before the request may be sent.
+        """
+        self._refill()
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold back every request for a while, after Telegram asked to retry later.
+
+        Args:
+            seconds: The number of seconds no request may be sent.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 1.0) - seconds * self.rate
+
+    @property
+    def idle(self) -> bool:
+        """
+        Whether the bucket is full, so dropping it changes nothing.
+
+        Returns:
+            True if the bucket is full.
+        """
+        self._refill()
+        return self.tokens >= self.burst
+
+
+class FloodControlMiddleware(BaseRequestMiddleware):
+    """
+    Bot session middleware keeping outgoing requests within the Telegram rate limits.
+
+    Requests addressed to a chat wait for a token of the global bucket, and the ones posting
+    a new message also for a token of the chat's bucket, while edits and deletions of the
+    dialog messages are not paced per chat. When Telegram still answers 429, the most
+    specific bucket of the request is paused for retry_after seconds, or the request
+    just waits if it has none, and the request is retried, so bursts are slowed down
+    instead of failing.
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: int, max_retries: int) -> None:
+        """
+        Args:
+            global_rate: The number of requests per second to all chats, 0 disables the limit.
+            chat_rate: The number of requests per second to a single chat, 0 disables the limit.
+            chat_burst: The number of requests that may be sent to a chat at once after it was idle.
+            max_retries: The number of times a request answered with 429 is retried.
+        """
+        self.global_bucket = TokenBucket(global_rate, max(1, int(global_rate))) if global_rate else None
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.chats: Dict[Any, TokenBucket] = {}
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket | None:
+        """
+        Get the bucket of a chat, dropping idle buckets when there are too many.
+
+        Args:
+            chat_id: The ID of the chat.
+
+        Returns:
+            The bucket of the chat, or None if chats are not limited.
+        """
+        if not self.chat_rate:
+            return None
+
+        bucket = self.chats.get(chat_id)
+        if bucket is None:
+            if len(self.chats) >= MAX_CHATS:
+                self.chats = {chat: bucket for chat, bucket in self.chats.items() if not bucket.idle}
+            bucket = self.chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any]
+    ) -> Response[Any]:
+        """
+        Middleware handler function.
+
+        Args:
+            make_request: The next request handler to call.
+            bot: The bot making the request.
+            method: The Bot API method.
+
+        Returns:
+            The response of the Bot API.
+        """
+        chat_id = getattr(method, 'chat_id', None)
+        buckets = []
+        if chat_id is not None:
+            buckets.append(self.global_bucket)
+            if type(method).__name__.startswith(SENDING_METHODS):
+                buckets.append(self._chat_bucket(chat_id))
+        buckets = [bucket for bucket in buckets if bucket]
+
+        for attempt in range(self.max_retries + 1):
+            delay = max((bucket.reserve() for bucket in buckets), default=0.0)
+            if delay:
+                await asyncio.sleep(delay)
+
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                retry_after_total.inc(type(method).__name__)
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f'{type(method).__name__} hit the flood limit, retrying in {error.retry_after} s')
+                if buckets:
+                    buckets[-1].pause(error.retry_after)
+                else:
+                    await asyncio.sleep(error.retry_after)
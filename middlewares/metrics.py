@@ -0,0 +1,79 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, Update
+
+from utils.metrics import handler_errors, handler_seconds, update_seconds, updates_total
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer middleware counting every update and timing it by update type.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Middleware handler function.
+
+        Args:
+            handler: The next handler to call.
+            event: The current Telegram update.
+            data: The data dictionary for the current context.
+
+        Returns:
+            The result of the next handler.
+        """
+        update_type = event.event_type
+        updates_total.inc(update_type)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            update_seconds.observe(time.perf_counter() - start, update_type)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Middleware timing the handlers of plain routers by handler name and dialog state.
+
+    Dialog updates are handled by the generic handlers of aiogram-dialog, so the dialog
+    getters and widget callbacks are timed by name with timed_handler instead.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Middleware handler function.
+
+        Args:
+            handler: The next handler to call.
+            event: The current Telegram event.
+            data: The data dictionary for the current context.
+
+        Returns:
+            The result of the next handler.
+        """
+        handler_object: HandlerObject | None = data.get('handler')
+        context = data.get('aiogd_context')
+        name = handler_object.callback.__qualname__ if handler_object else 'unknown'
+        state = context.state.state if context else ''
+
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.inc(name, state)
+            raise
+        finally:
+            handler_seconds.observe(time.perf_counter() - start, name, state)
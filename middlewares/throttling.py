@@ -0,0 +1,109 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+from redis.exceptions import RedisError
+
+from database import DBInterface
+from log_config import logger
+from utils.metrics import throttled_total
+from utils.scheduler import UserLocks
+
+# Refills a bucket for the time passed since its last update and takes a token if there is one.
+# Returns 1 if the update is allowed and 0 if it is throttled.
+TOKEN_BUCKET = '''
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return allowed
+'''
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Outer middleware dropping the updates of users who send them too fast.
+
+    Every user has a token bucket in Redis, so the limit holds across worker processes.
+    It must be registered before the FSM middleware, so throttled updates load no state.
+    The updates of a user are checked one at a time under the lock of the user, so a quick
+    tap can't overtake the one before it while its check waits for Redis. An allowed update
+    is passed on right after its lock is released, and takes its place in the scheduler,
+    or in the worker queue push, before the next update of the user is checked, so the
+    waiting itself happens in the scheduler and shows in its metrics.
+    A throttled button press is answered with a notice to stop the loading indicator.
+    If Redis fails, updates are let through rather than dropped.
+    """
+
+    def __init__(self, rate: float, burst: int, prefix: str = 'notebot:throttle') -> None:
+        """
+        Args:
+            rate: The number of updates per second a user may send.
+            burst: The number of updates a user may send at once after being idle.
+            prefix: The prefix of the bucket key names.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.prefix = prefix
+        self.locks = UserLocks()
+
+    async def allow(self, user_id: int) -> bool:
+        """
+        Take a token from the bucket of a user.
+
+        Args:
+            user_id: The ID of the user.
+
+        Returns:
+            True if the user is within the limit, False otherwise.
+        """
+        try:
+            return bool(await DBInterface.run_script(TOKEN_BUCKET, [f'{self.prefix}:{user_id}'],
+                                                     [self.rate, self.burst, time.time()]))
+        except RedisError:
+            logger.exception('Failed to check the rate limit')
+            return True
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Middleware handler function.
+
+        Args:
+            handler: The next handler to call.
+            event: The current Telegram update.
+            data: The data dictionary for the current context.
+
+        Returns:
+            The result of the next handler, or None for throttled updates.
+        """
+        user: User | None = data.get('event_from_user')
+
+        if user is None:
+            return await handler(event, data)
+
+        async with self.locks.hold(user.id):
+            allowed = await self.allow(user.id)
+        if allowed:
+            return await handler(event, data)
+
+        throttled_total.inc(event.event_type)
+        hub = data.get('_translator_hub')
+        if event.callback_query and hub:
+            await event.callback_query.answer(hub.get_translator_by_locale(locale=user.language_code).throttled())
+        return None
@@ -6,3 +6,7 @@ class NotesSG(StatesGroup):
     add_note = State()
     notes_list = State()
     note = State()
+    search = State()
+    import_notes = State()
+    reminder = State()
+    stats = State()
@@ -1,31 +1,194 @@
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
 from fluent_compiler.bundle import FluentBundle
 
-from fluentogram import FluentTranslator, TranslatorHub
+from fluentogram import FluentTranslator, TranslatorHub, TranslatorRunner
+
+# Directory with a <locale>/LC_MESSAGES folder of .ftl files per language
+LOCALES_DIR = Path(__file__).resolve().parent.parent / 'locales'
+
+# Locale used for unknown languages
+ROOT_LOCALE = 'en'
+
+# Seconds spent compiling the bundle of each locale, reported at startup
+compile_seconds: Dict[str, float] = {}
+
+
+@lru_cache(maxsize=256)
+def normalize_locale(locale: str | None) -> str:
+    """
+    Reduce a language code such as en-GB or pt_BR to the language itself.
+
+    Args:
+        locale: The language code of a user, None if Telegram did not send it.
+
+    Returns:
+        The lowercase language without the region.
+    """
+    return (locale or ROOT_LOCALE).replace('_', '-').split('-')[0].lower()
+
+
+class LazyFluentTranslator(FluentTranslator):
+    """
+    A FluentTranslator compiling its bundle from the .ftl files on first use.
+    """
+
+    def __init__(self, locale: str, filenames: List[str], separator: str = '-') -> None:
+        """
+        Args:
+            locale: The locale of the translator.
+            filenames: The paths of the .ftl files of the locale.
+            separator: The separator of message key parts.
+        """
+        self.locale = locale
+        self._filenames = filenames
+        self.separator = separator
+        self._bundle: FluentBundle | None = None
+
+    @property
+    def translator(self) -> FluentBundle:
+        """
+        The compiled bundle of the locale.
+        """
+        if self._bundle is None:
+            start = time.perf_counter()
+            self._bundle = FluentBundle.from_files(locale=self.locale, filenames=self._filenames)
+            compile_seconds[self.locale] = time.perf_counter() - start
+        return self._bundle
+
+
+class CachedTranslatorRunner(TranslatorRunner):
+    """
+    A TranslatorRunner reusing the already formatted messages without arguments.
+
+    Attribute access on a runner looks up message keys, so its own attributes
+    are private and the locale is read with runner_locale.
+    """
+
+    def __init__(self, translators: Iterable[FluentTranslator], messages: Dict[str, str], locale: str,
+                 separator: str = '-') -> None:
+        """
+        Args:
+            translators: The translators of the locale with its fallbacks.
+            messages: The formatted messages of the locale shared by all its runners.
+            locale: The locale of the runner.
+            separator: The separator of message key parts.
+        """
+        super().__init__(translators=translators, separator=separator)
+        self._messages = messages
+        self._locale = locale
+
+    def _get_translation(self, key: str, **kwargs) -> str:
+        """
+        Format a message, or take it from the shared messages if it has no arguments.
+
+        Args:
+            key: The key of the message.
+            kwargs: The arguments of the message.
+
+        Returns:
+            The formatted message.
+        """
+        if kwargs:
+            return super()._get_translation(key, **kwargs)
+
+        text = self._messages.get(key)
+        if text is None:
+            text = self._messages[key] = super()._get_translation(key)
+        return text
+
+
+def runner_locale(runner: TranslatorRunner) -> str:
+    """
+    Get the locale a translator runner formats messages in.
+
+    Args:
+        runner: The translator runner of a user.
+
+    Returns:
+        The locale of the runner, the root locale for runners of other hubs.
+    """
+    return getattr(runner, '_locale', ROOT_LOCALE)
+
+
+class CachedTranslatorHub(TranslatorHub):
+    """
+    A TranslatorHub resolving user language codes to a supported locale and sharing
+    the formatted messages of each locale between its runners.
+
+    Runners keep the attribute access state, so a new one is still created per update.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._messages: Dict[str, Dict[str, str]] = {locale: {} for locale in self.translators_map}
+
+    def get_translator_by_locale(self, locale: str | None) -> CachedTranslatorRunner:
+        """
+        Get a translator runner for the language of a user.
+
+        Args:
+            locale: The language code of the user.
+
+        Returns:
+            The runner of the matching locale, or of the root locale for unknown languages.
+        """
+        locale = normalize_locale(locale)
+        if locale not in self.translators_map:
+            locale = self.root_locale
+        return CachedTranslatorRunner(translators=self.translators_map[locale], messages=self._messages[locale],
+                                      locale=locale, separator=self.separator)
+
+
+def discover_locales(locales_dir: Path = LOCALES_DIR) -> Dict[str, List[str]]:
+    """
+    Find the .ftl files of every locale in the locales directory.
+
+    Args:
+        locales_dir: The directory with a <locale>/LC_MESSAGES folder per language.
+
+    Returns:
+        A dictionary of locales and the paths of their .ftl files.
+    """
+    locales = {}
+    for messages_dir in sorted(locales_dir.glob('*/LC_MESSAGES')):
+        filenames = sorted(str(path) for path in messages_dir.glob('*.ftl'))
+        if filenames:
+            locales[messages_dir.parent.name] = filenames
+    return locales
+
+
+def _fallbacks(locale: str, locales: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Get the order in which locales are tried for missing messages.
+
+    Args:
+        locale: The requested locale.
+        locales: All available locales.
+
+    Returns:
+        The locale itself, then the root locale, then the rest.
+    """
+    others = sorted(other for other in locales if other not in (locale, ROOT_LOCALE))
+    return tuple(dict.fromkeys([locale, ROOT_LOCALE, *others]))
 
 
 def create_translator_hub() -> TranslatorHub:
     """
-    Create a TranslatorHub instance with specified translators and locales.
+    Create a TranslatorHub instance for all locales found in the locales directory.
+
+    Bundles are compiled when a locale is first used.
 
     Returns:
         TranslatorHub: The initialized TranslatorHub instance.
     """
-    translator_hub = TranslatorHub(
-        {
-            "ru": ("ru", "en"),
-            "en": ("en", "ru")
-        },
-        [
-            FluentTranslator(
-                locale="ru",
-                translator=FluentBundle.from_files(
-                    locale="ru-RU",
-                    filenames=["locales/ru/LC_MESSAGES/txt.ftl"])),
-            FluentTranslator(
-                locale="en",
-                translator=FluentBundle.from_files(
-                    locale="en-US",
-                    filenames=["locales/en/LC_MESSAGES/txt.ftl"]))
-        ],
+    locales = discover_locales()
+    translator_hub = CachedTranslatorHub(
+        {locale: _fallbacks(locale, locales) for locale in locales},
+        [LazyFluentTranslator(locale=locale, filenames=filenames) for locale, filenames in locales.items()],
+        root_locale=ROOT_LOCALE
     )
     return translator_hub
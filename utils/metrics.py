@@ -0,0 +1,333 @@
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+# Default latency buckets in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    """
+    Format metric labels in the Prometheus text format.
+
+    Args:
+        names: The label names.
+        values: The label values in the order of the names.
+        extra: An already formatted label appended to the others.
+
+    Returns:
+        The formatted labels in braces, or an empty string without labels.
+    """
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """
+    A monotonically increasing counter with labels.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        """
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            labelnames: The names of the labels.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            labels: The label values in the order of the label names.
+            amount: The value added to the counter.
+        """
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        """
+        Render the counter in the Prometheus text format.
+
+        Returns:
+            A list of lines.
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in self._values.items():
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    """
+    A histogram of observed values, such as latencies, with labels.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = BUCKETS) -> None:
+        """
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            labelnames: The names of the labels.
+            buckets: The upper bounds of the buckets in ascending order.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """
+        Record an observed value.
+
+        Args:
+            value: The observed value.
+            labels: The label values in the order of the label names.
+        """
+        # Bucket counts followed by the total count and the sum
+        values = self._values.get(labels)
+        if values is None:
+            values = self._values[labels] = [0] * (len(self.buckets) + 2)
+
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[index] += 1
+        values[-2] += 1
+        values[-1] += value
+
+    def collect(self) -> List[str]:
+        """
+        Render the histogram in the Prometheus text format.
+
+        Returns:
+            A list of lines.
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, values in self._values.items():
+            for bound, count in zip(self.buckets, values):
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}')
+            le = 'le="+Inf"'
+            lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {values[-2]}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {values[-2]}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {values[-1]}')
+        return lines
+
+
+class Gauges:
+    """
+    A group of metrics read from a callback when the metrics are collected,
+    used to expose the counters kept by other components.
+    """
+
+    def __init__(self, prefix: str, documentation: str, read: Callable[[], Dict[str, float]],
+                 kind: str = 'gauge') -> None:
+        """
+        Args:
+            prefix: The prefix of the metric names.
+            documentation: The help text of the metrics.
+            read: A function returning the current values by name.
+            kind: The type of the metrics, gauge or counter.
+        """
+        self.prefix = prefix
+        self.documentation = documentation
+        self.read = read
+        self.kind = kind
+
+    def collect(self) -> List[str]:
+        """
+        Render the gauges in the Prometheus text format.
+
+        Returns:
+            A list of lines.
+        """
+        lines = []
+        for key, value in self.read().items():
+            name = f'{self.prefix}_{key}_total' if self.kind == 'counter' else f'{self.prefix}_{key}'
+            lines += [f'# HELP {name} {self.documentation}', f'# TYPE {name} {self.kind}', f'{name} {value}']
+        return lines
+
+
+class Registry:
+    """
+    A collection of the metrics exposed by the process.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+
+    def register(self, metric: Any) -> Any:
+        """
+        Add a metric to the registry.
+
+        Args:
+            metric: A Counter, Histogram or Gauges instance.
+
+        Returns:
+            The registered metric.
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Returns:
+            The text exposition of the metrics.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines += metric.collect()
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+updates_total = registry.register(Counter('notebot_updates_total', 'Received updates.', ('type',)))
+update_seconds = registry.register(Histogram('notebot_update_seconds', 'Time spent handling an update.', ('type',)))
+handler_seconds = registry.register(Histogram('notebot_handler_seconds', 'Time spent in a handler.',
+                                              ('handler', 'state')))
+handler_errors = registry.register(Counter('notebot_handler_errors_total', 'Exceptions raised by a handler.',
+                                           ('handler', 'state')))
+db_seconds = registry.register(Histogram('notebot_db_seconds', 'Time spent in a database operation.',
+                                         ('operation',)))
+db_errors = registry.register(Counter('notebot_db_errors_total', 'Failed database operations.', ('operation',)))
+throttled_total = registry.register(Counter('notebot_throttled_updates_total',
+                                            'Updates dropped by the user rate limit.', ('type',)))
+retry_after_total = registry.register(Counter('notebot_retry_after_total', 'Bot API requests answered with 429.',
+                                              ('method',)))
+fsm_writes_total = registry.register(Counter('notebot_fsm_writes_total', 'FSM storage writes by outcome.',
+                                             ('record', 'outcome')))
+reminders_total = registry.register(Counter('notebot_reminders_total', 'Delivered reminders by outcome.', ('outcome',)))
+
+
+def timed_methods(histogram: Histogram, errors: Counter) -> Callable[[type], type]:
+    """
+    Create a class decorator timing every static coroutine method of the class.
+
+    The method name is used as the only label of the metrics.
+
+    Args:
+        histogram: The histogram the durations are recorded in.
+        errors: The counter of exceptions raised by the methods.
+
+    Returns:
+        The class decorator.
+    """
+    def wrap(method: Callable[..., Any], name: str) -> Callable[..., Any]:
+        @wraps(method)
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                errors.inc(name)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start, name)
+        return timed
+
+    def decorator(cls: type) -> type:
+        for name, attr in list(vars(cls).items()):
+            if isinstance(attr, staticmethod) and iscoroutinefunction(attr.__func__):
+                setattr(cls, name, staticmethod(wrap(attr.__func__, name)))
+        return cls
+
+    return decorator
+
+
+def _dialog_state(values: Sequence[Any]) -> str:
+    """
+    Find the dialog state among the arguments of a dialog getter or widget callback.
+
+    Args:
+        values: The positional and keyword argument values.
+
+    Returns:
+        The name of the current dialog state, empty if there is no dialog manager or context.
+    """
+    for value in values:
+        if hasattr(value, 'has_context') and hasattr(value, 'current_context'):
+            return value.current_context().state.state if value.has_context() else ''
+    return ''
+
+
+def timed_handler(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Time a dialog getter or widget callback by its name and the dialog state it runs in.
+
+    aiogram-dialog calls them from its own generic message and callback handlers,
+    which is all the handler middleware sees of a dialog update.
+
+    Args:
+        func: The getter or callback coroutine function.
+
+    Returns:
+        The timed function.
+    """
+    name = func.__name__
+
+    @wraps(func)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        state = _dialog_state((*args, *kwargs.values()))
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            handler_errors.inc(name, state)
+            raise
+        finally:
+            handler_seconds.observe(time.perf_counter() - start, name, state)
+    return timed
+
+
+async def _metrics_handler(request: 'web.Request') -> 'web.Response':
+    """
+    Serve the metrics of the process.
+
+    Args:
+        request: The incoming request.
+
+    Returns:
+        The response with the text exposition of the metrics.
+    """
+    from aiohttp import web
+
+    return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
+
+
+async def start_metrics_server(host: str, port: int) -> 'web.AppRunner':
+    """
+    Start an HTTP server exposing the metrics on /metrics.
+
+    Args:
+        host: The host address the server binds to.
+        port: The port number the server binds to.
+
+    Returns:
+        The runner of the server, used to stop it.
+    """
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_get('/metrics', _metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    return runner
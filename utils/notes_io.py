@@ -0,0 +1,267 @@
+import asyncio
+import json
+import os
+import tempfile
+import zipfile
+import zlib
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, Dict, Tuple
+
+import aiofiles
+from aiogram import Bot
+from aiogram.types import Document
+
+from database import DBInterface, NotesIndex, SearchIndex, Stats
+
+# Number of notes written to or read from Redis at once
+BATCH_SIZE = 100
+
+# Largest file the Bot API lets bots download
+MAX_FILE_SIZE = 20 * 1024 * 1024
+
+# Notes larger than this are skipped on import
+MAX_NOTE_SIZE = 1024 * 1024
+
+# Supported file extensions of imported documents
+SUFFIXES = ('.jsonl', '.json', '.md', '.markdown', '.txt', '.zip')
+
+# Errors the readers raise on a malformed document, reported to the caller as ValueError
+READ_ERRORS = (KeyError, TypeError, UnicodeDecodeError, EOFError, NotImplementedError, zlib.error,
+               zipfile.BadZipFile, zipfile.LargeZipFile)
+
+
+def _parse_note(data: Any) -> Tuple[str, str]:
+    """
+    Take the title and body of a note from a decoded JSON value.
+
+    Args:
+        data: The decoded JSON value.
+
+    Returns:
+        The title and body of the note.
+
+    Raises:
+        ValueError: If the value is not an object with a string title and note.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('title'), str) or not isinstance(data.get('note'), str):
+        raise ValueError('A note must be an object with a string title and note')
+    return data['title'], data['note']
+
+
+async def _read_jsonl(path: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Read notes from a JSON lines file with a title and note key per line.
+
+    Args:
+        path: The path of the file.
+
+    Yields:
+        The title and body of every note.
+
+    Raises:
+        ValueError: If a line is not a valid note.
+    """
+    async with aiofiles.open(path, encoding='utf-8') as file:
+        async for line in file:
+            if line.strip():
+                yield _parse_note(json.loads(line))
+
+
+async def _read_json(path: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Read notes from a JSON file holding an array of objects with a title and note key.
+
+    The whole array is decoded at once, the document size is limited by MAX_FILE_SIZE.
+
+    Args:
+        path: The path of the file.
+
+    Yields:
+        The title and body of every note.
+
+    Raises:
+        ValueError: If the file is not an array of valid notes.
+    """
+    async with aiofiles.open(path, encoding='utf-8') as file:
+        data = await asyncio.to_thread(json.loads, await file.read())
+
+    if not isinstance(data, list):
+        raise ValueError('A JSON document must hold an array of notes')
+    for item in data:
+        yield _parse_note(item)
+
+
+async def _read_markdown(path: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Read notes from a Markdown file where every note starts with a level one heading.
+
+    Args:
+        path: The path of the file.
+
+    Yields:
+        The title and body of every note.
+    """
+    title, body = None, []
+
+    async with aiofiles.open(path, encoding='utf-8') as file:
+        async for line in file:
+            if line.startswith('# '):
+                if title:
+                    yield title, ''.join(body)
+                title, body = line[2:], []
+            elif title is not None:
+                body.append(line)
+
+    if title:
+        yield title, ''.join(body)
+
+
+async def _read_zip(path: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Read notes from a zip archive of text files named after the notes.
+
+    Encrypted files are skipped, since they can't be read without a password.
+
+    Args:
+        path: The path of the archive.
+
+    Yields:
+        The title and body of every note.
+    """
+    archive = await asyncio.to_thread(zipfile.ZipFile, path)
+
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or info.file_size > MAX_NOTE_SIZE or info.flag_bits & 0x1:
+                continue
+            data = await asyncio.to_thread(archive.read, info)
+            yield PurePosixPath(info.filename).stem, data.decode('utf-8')
+
+
+def read_notes(path: str, suffix: str) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Get a reader of the notes in a file, chosen by the file extension.
+
+    Args:
+        path: The path of the file.
+        suffix: The lowercase extension of the original file name.
+
+    Returns:
+        An asynchronous iterator of note titles and bodies.
+    """
+    if suffix == '.zip':
+        return _read_zip(path)
+    if suffix == '.json':
+        return _read_json(path)
+    if suffix == '.jsonl':
+        return _read_jsonl(path)
+    return _read_markdown(path)
+
+
+async def _save_batch(user_id: str, notes: Dict[str, str]) -> int:
+    """
+    Save a batch of notes with a single HSET and index them in the same pipeline.
+
+    Args:
+        user_id: The ID of the user owning the notes.
+        notes: A dictionary of note titles and bodies.
+
+    Returns:
+        The number of saved notes.
+    """
+    await NotesIndex.ensure(user_id)
+    async with DBInterface.batch() as batch:
+        batch.hset_data(name=user_id, mapping=notes)
+        previous = await NotesIndex.add_many(user_id, notes, batch)
+        await SearchIndex.add_many(user_id, notes, batch)
+        await Stats.saved(user_id, notes, previous, batch)
+    return len(notes)
+
+
+async def import_notes(user_id: str, notes: AsyncIterator[Tuple[str, str]]) -> int:
+    """
+    Save the notes read from a file in batches.
+
+    Titles are capitalized like the ones entered in the dialog, notes without a title
+    or body are skipped.
+
+    Args:
+        user_id: The ID of the user owning the notes.
+        notes: An asynchronous iterator of note titles and bodies.
+
+    Returns:
+        The number of saved notes.
+    """
+    count = 0
+    batch = {}
+
+    async for title, note in notes:
+        title, note = title.strip().capitalize(), note.strip()
+        if not title or not note or len(note) > MAX_NOTE_SIZE:
+            continue
+
+        batch[title] = note
+        if len(batch) >= BATCH_SIZE:
+            count += await _save_batch(user_id, batch)
+            batch = {}
+
+    if batch:
+        count += await _save_batch(user_id, batch)
+    return count
+
+
+async def import_document(bot: Bot, document: Document, user_id: str) -> int:
+    """
+    Download an uploaded document to a temporary file and import its notes.
+
+    Args:
+        bot: The bot instance.
+        document: The uploaded document.
+        user_id: The ID of the user owning the notes.
+
+    Returns:
+        The number of saved notes.
+
+    Raises:
+        ValueError: If the document is too large, of an unsupported type or malformed.
+    """
+    suffix = PurePosixPath(document.file_name or '').suffix.lower()
+    if suffix not in SUFFIXES or (document.file_size or 0) > MAX_FILE_SIZE:
+        raise ValueError(f'Unsupported document {document.file_name}')
+
+    descriptor, path = tempfile.mkstemp(suffix=suffix)
+    os.close(descriptor)
+
+    try:
+        await bot.download(document, destination=path)
+        return await import_notes(user_id, read_notes(path, suffix))
+    except READ_ERRORS as error:
+        raise ValueError(f'Malformed document {document.file_name}') from error
+    finally:
+        os.remove(path)
+
+
+async def export_notes(user_id: str) -> Tuple[str, int]:
+    """
+    Write all notes of a user to a temporary JSON lines file.
+
+    The notes hash is read with HSCAN in batches, so the whole collection is never
+    held in memory. The caller must remove the file.
+
+    Args:
+        user_id: The ID of the user owning the notes.
+
+    Returns:
+        The path of the file and the number of exported notes.
+    """
+    descriptor, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(descriptor)
+    count = 0
+
+    async with aiofiles.open(path, 'w', encoding='utf-8') as file:
+        async for notes in DBInterface.hscan_batches(user_id, count=BATCH_SIZE):
+            await file.write(''.join(json.dumps({'title': title, 'note': note}, ensure_ascii=False) + '\n'
+                                     for title, note in notes.items()))
+            count += len(notes)
+
+    return path, count
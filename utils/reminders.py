@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import List, Set
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from fluentogram import TranslatorHub
+from redis.exceptions import RedisError
+
+from config.config import Reminders as ReminderSettings
+from database import DBInterface, Reminder, Reminders
+from log_config import logger
+from utils.metrics import reminders_total
+
+# Maximum number of characters in a Telegram message
+MESSAGE_LENGTH = 4096
+
+
+def owned_shards(index: int, processes: int, shards: int) -> List[int]:
+    """
+    Get the due queues a process delivers the reminders of.
+
+    Args:
+        index: The number of the process.
+        processes: The number of processes delivering reminders.
+        shards: The number of due queues.
+
+    Returns:
+        The numbers of the queues of the process.
+    """
+    return [shard for shard in range(shards) if shard % processes == index]
+
+
+async def _deliver(bot: Bot, hub: TranslatorHub, reminder: Reminder) -> None:
+    """
+    Send a reminder with the beginning of its note and acknowledge it.
+
+    Reminders that cannot be sent, because the note was deleted or the user blocked
+    the bot, are acknowledged too. Other failures leave the reminder in its queue,
+    so it is delivered again when its lease ends.
+
+    Args:
+        bot: The bot sending the reminder.
+        hub: The translator hub the message is translated with.
+        reminder: The reminder taken from a due queue.
+    """
+    try:
+        note = await DBInterface.hget(reminder.user_id, reminder.title, cached=False)
+        if note is None:
+            outcome = 'dropped'
+        else:
+            i18n = hub.get_translator_by_locale(locale=reminder.locale)
+            text = f'{i18n.reminder.fired(title=reminder.title)}\n\n{note}'
+            await bot.send_message(int(reminder.user_id), text[:MESSAGE_LENGTH])
+            outcome = 'sent'
+    except (TelegramBadRequest, TelegramForbiddenError) as error:
+        logger.warning(f'Dropped the reminder of {reminder.user_id}: {error}')
+        outcome = 'dropped'
+    except Exception:
+        logger.exception(f'Failed to send the reminder of {reminder.user_id}')
+        reminders_total.inc('failed')
+        return
+
+    reminders_total.inc(outcome)
+    try:
+        await Reminders.ack(reminder)
+    except RedisError:
+        logger.exception(f'Failed to acknowledge the reminder of {reminder.user_id}')
+
+
+async def deliver_reminders(bot: Bot, hub: TranslatorHub, shards: List[int], settings: ReminderSettings) -> None:
+    """
+    Poll the due queues of a process and send the due reminders.
+
+    No more reminders are taken than can be sent at once, so none waits long enough
+    for its lease to end, and the queues are polled in turn starting from a different
+    one every time, so a busy queue does not hold back the others. Reminders are sent
+    by a bot of their own, so they never wait for the same connections or rate limit
+    tokens as the replies to the updates.
+
+    Args:
+        bot: The bot sending the reminders.
+        hub: The translator hub the messages are translated with.
+        shards: The numbers of the queues of the process.
+        settings: The reminder configuration.
+    """
+    if not shards:
+        return
+
+    logger.warning(f'Delivering the reminders of {len(shards)} queues')
+    tasks: Set[asyncio.Task] = set()
+
+    while True:
+        taken = 0
+        for shard in shards:
+            room = settings.concurrency - len(tasks)
+            if room <= 0:
+                break
+
+            try:
+                reminders = await Reminders.claim(shard, time.time(), min(settings.batch_size, room), settings.lease)
+            except RedisError:
+                logger.exception(f'Failed to read the reminders of queue {shard}')
+                continue
+
+            for reminder in reminders:
+                task = asyncio.create_task(_deliver(bot, hub, reminder))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            taken += len(reminders)
+
+        shards = shards[1:] + shards[:1]
+        if len(tasks) >= settings.concurrency:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        elif not taken:
+            await asyncio.sleep(settings.poll_interval)
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Dict
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+
+class UpdateScheduler(BaseEventIsolation):
+    """
+    Events isolation that handles the updates of each user one at a time, in the order
+    they arrived, while limiting the number of updates handled at once.
+
+    The dispatcher enters lock() before the FSM state of an update is loaded, so
+    rapid button taps of a user can't interleave and overwrite each other's dialog data.
+    Waiting updates queue on the lock of their user first and only then on the global
+    limit, so a single busy user never holds more than one slot.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        """
+        Args:
+            concurrency: The maximum number of updates handled at once.
+        """
+        self.concurrency = concurrency
+        self.waiting = 0
+        self.running = 0
+        self.handled = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._locks: Dict[StorageKey, asyncio.Lock] = {}
+        self._depths: Dict[StorageKey, int] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        """
+        Wait for the turn of an update and hold it while the update is handled.
+
+        Args:
+            key: The storage key of the user the update belongs to.
+        """
+        self._depths[key] = self._depths.get(key, 0) + 1
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self.waiting += 1
+        waiting = True
+        start = time.monotonic()
+
+        try:
+            async with lock, self._semaphore:
+                waited = time.monotonic() - start
+                self.waiting -= 1
+                waiting = False
+                self.running += 1
+                self.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+
+                try:
+                    yield
+                finally:
+                    self.running -= 1
+                    self.handled += 1
+        finally:
+            if waiting:
+                self.waiting -= 1
+            self._depths[key] -= 1
+            if not self._depths[key]:
+                del self._depths[key]
+                del self._locks[key]
+
+    async def close(self) -> None:
+        """
+        Forget the locks of all users.
+        """
+        self._locks.clear()
+        self._depths.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the backpressure counters.
+
+        Returns:
+            A dictionary with the number of waiting, running and handled updates, the number of
+            users with pending updates, the deepest queue of a single user and the total and
+            maximum time updates waited for their turn in seconds.
+        """
+        return {'waiting': self.waiting, 'running': self.running, 'handled': self.handled,
+                'users': len(self._depths), 'max_depth': max(self._depths.values(), default=0),
+                'wait_time': self.wait_time, 'max_wait': self.max_wait}
+
+
+class UserLocks:
+    """
+    Per-user locks keeping the updates of each user in the order they arrived through
+    the awaits made before the update scheduler takes them, like a rate limit check
+    or a push to a worker queue.
+
+    A lock is forgotten as soon as no update of its user holds or waits for it.
+    """
+
+    def __init__(self) -> None:
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._depths: Dict[int, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, user_id: int) -> AsyncGenerator[None, None]:
+        """
+        Wait for the earlier updates of a user and hold the lock of the user.
+
+        Args:
+            user_id: The ID of the user the update belongs to.
+        """
+        self._depths[user_id] = self._depths.get(user_id, 0) + 1
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+
+        try:
+            async with lock:
+                yield
+        finally:
+            self._depths[user_id] -= 1
+            if not self._depths[user_id]:
+                del self._depths[user_id]
+                del self._locks[user_id]
@@ -0,0 +1,114 @@
+"""
+Report where the startup time of the bot goes.
+
+The bot is imported in a fresh interpreter with -X importtime and the time spent
+importing each top-level package is summed, then the translation bundle of every
+locale is compiled and timed.
+
+Usage:
+    python -m utils.startup --top 15
+"""
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from log_config import logger
+
+# Root directory of the project, the bot is imported from there
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def log_startup(imported: float) -> None:
+    """
+    Log how long the process took to start, in CPU time since it was created.
+
+    Args:
+        imported: The CPU time taken when the modules of the bot were imported.
+    """
+    from utils.i18n import compile_seconds
+
+    compiled = sum(compile_seconds.values())
+    logger.info(f'Started in {time.process_time():.2f} s of CPU time: {imported:.2f} s importing, '
+                f'{compiled:.2f} s compiling {len(compile_seconds)} translation bundles')
+
+
+def measure_imports(module: str = 'main') -> Dict[str, float]:
+    """
+    Import a module in a fresh interpreter and sum the import time of every top-level package.
+
+    Args:
+        module: The module to be imported.
+
+    Returns:
+        A dictionary of top-level packages and the seconds spent importing their modules.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, cwd=PROJECT_DIR, check=True)
+
+    totals: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        if own.strip().isdigit():
+            totals[name.strip().split('.')[0]] += int(own) / 1e6
+    return dict(totals)
+
+
+def measure_bundles() -> Dict[str, float]:
+    """
+    Compile the translation bundle of every locale.
+
+    Returns:
+        A dictionary of locales and the seconds spent compiling their bundles.
+    """
+    from utils.i18n import compile_seconds, create_translator_hub
+
+    hub = create_translator_hub()
+    for translators in hub.translators_map.values():
+        translators[0].translator
+    return dict(compile_seconds)
+
+
+def render_report(imports: Dict[str, float], bundles: Dict[str, float], top: int) -> str:
+    """
+    Render the startup times as a table.
+
+    Args:
+        imports: The import time of every top-level package.
+        bundles: The compile time of every locale.
+        top: The number of the slowest packages listed, the rest are summed up.
+
+    Returns:
+        The text of the report.
+    """
+    rows: List[Tuple[str, float]] = sorted(imports.items(), key=lambda item: item[1], reverse=True)
+    rest = sum(seconds for _, seconds in rows[top:])
+    rows = rows[:top] + ([('other packages', rest)] if rest else [])
+    rows += [(f'compile {locale} bundle', seconds) for locale, seconds in sorted(bundles.items())]
+
+    total = sum(imports.values()) + sum(bundles.values())
+    lines = [f'{"stage":<40} {"seconds":>8} {"share":>6}']
+    lines += [f'{name:<40} {seconds:>8.3f} {seconds / total:>6.1%}' for name, seconds in rows]
+    lines.append(f'{"total":<40} {total:>8.3f}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    """
+    Measure the startup of the bot and print the report.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15, help='number of the slowest packages listed')
+    parser.add_argument('--module', default='main', help='module whose import is measured')
+    args = parser.parse_args()
+
+    print(render_report(measure_imports(args.module), measure_bundles(), args.top))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Recompute the usage counters from the notes stored in Redis.
+
+The counters are kept up to date by the bot, this tool rebuilds them when they are
+first introduced or have drifted. Every user's notes hash is found with SCAN and its
+size is summed from the note metadata, or from the notes if the metadata is incomplete.
+Every Redis call, SCAN pages included, is paced to a number of calls per second, so
+the tool can run against the production instance. Notes changed during the run may be
+counted as they were before, so it is best run when the bot is idle.
+
+Usage:
+    python -m utils.stats --rate 200
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, Tuple
+
+from database import DBInterface, NoteMeta, NotesIndex, Stats
+
+# Pattern of the notes hashes, named by user ID. Only hashes are returned, which leaves out
+# the sorted sets of the search terms and title indexes, while the metadata and words hashes
+# of a user are told apart by their suffix
+USER_KEYS = '[1-9]*'
+
+
+class Pacer:
+    """
+    Spaces calls evenly to stay within a rate.
+    """
+
+    def __init__(self, rate: float) -> None:
+        """
+        Args:
+            rate: The number of calls per second, 0 disables the limit.
+        """
+        self.interval = 1 / rate if rate else 0.0
+        self.next_at = time.monotonic()
+
+    async def wait(self) -> None:
+        """
+        Wait until the next call may be made.
+        """
+        now = time.monotonic()
+        delay = self.next_at - now
+        self.next_at = max(self.next_at, now) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def measure_user(user_id: str, pacer: Pacer) -> Tuple[int, int]:
+    """
+    Count the notes of a user and the characters in them.
+
+    Args:
+        user_id: The ID of the user, which is the name of the notes hash.
+        pacer: The pacer of the Redis calls.
+
+    Returns:
+        The number of notes and their size in characters.
+    """
+    await pacer.wait()
+    count = await DBInterface.hlen(user_id)
+    await pacer.wait()
+    complete = await DBInterface.hlen(NotesIndex.meta_key(user_id)) == count
+
+    size = 0
+    name = NotesIndex.meta_key(user_id) if complete else user_id
+    batches = DBInterface.hscan_batches(name)
+    while True:
+        await pacer.wait()
+        batch = await anext(batches, None)
+        if batch is None:
+            break
+        if complete:
+            size += sum(NoteMeta.unpack(value).size for value in batch.values())
+        else:
+            size += sum(map(len, batch.values()))
+    return count, size
+
+
+async def recompute(rate: float, dry_run: bool = False) -> Dict[str, Tuple[int, int]]:
+    """
+    Recompute the note counters of every user and replace the stored ones.
+
+    The cursor is walked here rather than with scan_iter, so the pacer is waited for
+    before every SCAN page as well as before every read of a user's notes.
+
+    Args:
+        rate: The maximum number of Redis calls per second, 0 disables the limit.
+        dry_run: Only compute the counters, without storing them.
+
+    Returns:
+        A dictionary of user IDs and their note count and size.
+    """
+    pacer = Pacer(rate)
+    totals = {}
+    cursor = None
+    while cursor != 0:
+        await pacer.wait()
+        cursor, keys = await DBInterface.scan(cursor or 0, USER_KEYS, key_type='hash')
+        for key in keys:
+            if key.isdigit():
+                totals[key] = await measure_user(key, pacer)
+
+    if not dry_run:
+        await Stats.replace(totals)
+    return totals
+
+
+def main() -> None:
+    """
+    Recompute the counters and print the totals.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=200,
+                        help='maximum number of Redis calls per second, 0 for no limit')
+    parser.add_argument('--top', type=int, default=10, help='number of the heaviest users printed')
+    parser.add_argument('--dry-run', action='store_true', help='print the counters without storing them')
+    args = parser.parse_args()
+
+    totals = asyncio.run(recompute(args.rate, args.dry_run))
+
+    print(f'{len(totals)} users, {sum(notes for notes, _ in totals.values())} notes, '
+          f'{sum(size for _, size in totals.values())} characters')
+    for user_id, (notes, size) in sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f'{user_id:<20} {notes:>8} notes {size:>12} characters')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import asyncio
+import json
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from log_config import logger
+
+# Prefix of the Redis lists the updates are fanned out through
+QUEUE_PREFIX = 'notebot:updates'
+
+# Seconds a worker waits for an update before polling its queue again
+POP_TIMEOUT = 5
+
+
+def update_queue(user_id: int | None, workers: int) -> str:
+    """
+    Get the queue an update is routed to.
+
+    Updates of the same user always go to the same worker, which handles them in
+    the order they arrived, so the dialog state of a user is never updated from two
+    processes at once.
+
+    Args:
+        user_id: The ID of the user who sent the update, None for updates without a user.
+        workers: The number of worker processes.
+
+    Returns:
+        The name of the Redis list of the worker.
+    """
+    return f'{QUEUE_PREFIX}:{(user_id or 0) % workers}'
+
+
+async def _feed_update(dp: Dispatcher, bot: Bot, update: str, queue: str, slots: asyncio.Semaphore,
+                       **kwargs: Any) -> None:
+    """
+    Handle a single update popped from a worker queue and release its slot.
+
+    Args:
+        dp: The dispatcher handling the update.
+        bot: The bot instance.
+        update: The update serialized to JSON.
+        queue: The name of the Redis list the update was popped from.
+        slots: The semaphore limiting the number of updates popped but not handled yet.
+        kwargs: Additional data passed to the handlers.
+    """
+    try:
+        await dp.feed_raw_update(bot, json.loads(update), **kwargs)
+    except Exception:
+        logger.exception(f'Failed to handle an update from {queue}')
+    finally:
+        slots.release()
+
+
+async def consume_updates(redis: Redis, dp: Dispatcher, bot: Bot, queue: str, limit: int, **kwargs: Any) -> None:
+    """
+    Feed the updates of a worker queue to the dispatcher.
+
+    Updates are handled concurrently, the events isolation of the dispatcher keeps the
+    updates of each user in order. No more than limit updates are popped before they
+    are handled, the rest waits in Redis.
+
+    Args:
+        redis: The Redis client the updates are read with, waiting for replies longer than POP_TIMEOUT.
+        dp: The dispatcher handling the updates.
+        bot: The bot instance.
+        queue: The name of the Redis list of the worker.
+        limit: The maximum number of updates popped but not handled yet.
+        kwargs: Additional data passed to the handlers.
+    """
+    logger.warning(f'Worker started on {queue}')
+    slots = asyncio.Semaphore(limit)
+    tasks = set()
+
+    while True:
+        await slots.acquire()
+
+        try:
+            item = await redis.blpop([queue], timeout=POP_TIMEOUT)
+        except RedisError:
+            slots.release()
+            logger.exception(f'Failed to read updates from {queue}')
+            await asyncio.sleep(POP_TIMEOUT)
+            continue
+
+        if item is None:
+            slots.release()
+            continue
+
+        task = asyncio.create_task(_feed_update(dp, bot, item[1], queue, slots, **kwargs))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)